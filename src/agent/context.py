@@ -1,15 +1,56 @@
-from typing import Dict, List, Optional, Any
-import json
-from redis import Redis
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Iterator, Set
+import asyncio
+from contextlib import contextmanager
+from decimal import Decimal
+import orjson
 from src.models.base import Context, Message, Tool
 
+if TYPE_CHECKING:
+    # Клиент нужен только для аннотаций, пакет redis не импортируется при загрузке модуля
+    from redis import Redis
+
+# Ключи Redis: сообщения и инструменты хранятся списками и дописываются,
+# метаданные - хешем, где перезаписываются только измененные поля
+MESSAGES_KEY = "mcp:context:messages"
+TOOLS_KEY = "mcp:context:tools"
+METADATA_KEY = "mcp:context:meta"
+# Прежние ключи (весь контекст одним JSON и метаданные одним JSON), переносятся при загрузке
+LEGACY_CONTEXT_KEY = "mcp:context"
+LEGACY_METADATA_KEY = "mcp:context:metadata"
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Сериализация типов, которые orjson не поддерживает нативно"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+def _dumps(data: Any) -> bytes:
+    """Сериализация в JSON для записи в Redis"""
+    return orjson.dumps(data, default=_orjson_default, option=_ORJSON_OPTIONS)
+
 
 class AgentContext:
     """Менеджер контекста для MCP агента"""
 
-    def __init__(self, redis_client: Redis):
+    def __init__(self, redis_client: "Redis", flush_delay: Optional[float] = None):
+        """
+        Args:
+            redis_client: Клиент Redis
+            flush_delay: Задержка отложенной записи в секундах (None - запись при каждом изменении)
+        """
         self.redis = redis_client
+        self.flush_delay = flush_delay
         self._context: Optional[Context] = None
+        self._tools_by_name: Dict[str, Tool] = {}
+        self._pending_messages: List[bytes] = []
+        self._pending_tools: List[bytes] = []
+        self._dirty_metadata: Set[str] = set()
+        self._batch_depth = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
 
     @property
     def context(self) -> Context:
@@ -21,17 +62,24 @@ class AgentContext:
     def add_message(self, message: Message) -> None:
         """Добавление сообщения в контекст"""
         self.context.messages.append(message)
-        self._save_context()
+        self._pending_messages.append(_dumps(message.model_dump()))
+        self._schedule_flush()
 
     def add_tool(self, tool: Tool) -> None:
         """Регистрация инструмента в контексте"""
         self.context.tools.append(tool)
-        self._save_context()
+        self._tools_by_name.setdefault(tool.name, tool)
+        self._pending_tools.append(_dumps(tool.model_dump()))
+        self._schedule_flush()
 
     def update_metadata(self, key: str, value: Any) -> None:
-        """Обновление метаданных контекста"""
+        """Обновление метаданных контекста
+
+        Значения хранятся в JSON: Decimal записывается строкой и после load_context возвращается как str.
+        """
         self.context.metadata[key] = value
-        self._save_context()
+        self._dirty_metadata.add(key)
+        self._schedule_flush()
 
     def get_conversation_history(self, limit: Optional[int] = None) -> List[Message]:
         """Получение истории сообщений"""
@@ -42,26 +90,126 @@ class AgentContext:
 
     def get_tool_by_name(self, name: str) -> Optional[Tool]:
         """Поиск инструмента по имени"""
+        return self._tools_by_name.get(name)
+
+    def _index_tools(self) -> None:
+        """Перестроение индекса инструментов по имени"""
+        self._tools_by_name = {}
         for tool in self.context.tools:
-            if tool.name == name:
-                return tool
-        return None
+            self._tools_by_name.setdefault(tool.name, tool)
 
-    def _save_context(self) -> None:
-        """Сохранение контекста в Redis"""
-        if self._context:
-            context_data = self._context.json()
-            self.redis.set("mcp:context", context_data)
+    def _schedule_flush(self) -> None:
+        """Планирование записи накопленных изменений в Redis"""
+        if self._batch_depth:
+            return
+        if self.flush_delay is None:
+            self.flush()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self.flush)
+
+    def _reset_pending(self) -> None:
+        """Сброс накопленных изменений"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending_messages = []
+        self._pending_tools = []
+        self._dirty_metadata = set()
+
+    def flush(self) -> None:
+        """Запись накопленных изменений в Redis"""
+        if self._pending_messages or self._pending_tools or self._dirty_metadata:
+            # Все команды уходят одним пакетом за один сетевой обмен
+            pipe = self.redis.pipeline(transaction=False)
+            if self._pending_messages:
+                pipe.rpush(MESSAGES_KEY, *self._pending_messages)
+            if self._pending_tools:
+                pipe.rpush(TOOLS_KEY, *self._pending_tools)
+            if self._dirty_metadata:
+                metadata = self.context.metadata
+                pipe.hset(METADATA_KEY, mapping={key: _dumps(metadata[key]) for key in self._dirty_metadata})
+            pipe.execute()
+        self._reset_pending()
+
+    @contextmanager
+    def batch(self) -> Iterator["AgentContext"]:
+        """Группировка изменений в одну запись в Redis"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
 
     def load_context(self) -> None:
         """Загрузка контекста из Redis"""
-        context_data = self.redis.get("mcp:context")
-        if context_data:
-            self._context = Context.parse_raw(context_data)
-        else:
-            self._context = Context()
+        # Накопленные изменения записываются до чтения, иначе они потеряются
+        self.flush()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lrange(MESSAGES_KEY, 0, -1)
+        pipe.lrange(TOOLS_KEY, 0, -1)
+        pipe.hgetall(METADATA_KEY)
+        pipe.get(LEGACY_CONTEXT_KEY)
+        pipe.get(LEGACY_METADATA_KEY)
+        messages, tools, metadata, legacy_context, legacy_metadata = pipe.execute()
+        context = Context(
+            messages=[Message.model_validate(orjson.loads(data)) for data in messages or []],
+            tools=[Tool.model_validate(orjson.loads(data)) for data in tools or []],
+            metadata={
+                key.decode() if isinstance(key, bytes) else key: orjson.loads(value)
+                for key, value in (metadata or {}).items()
+            }
+        )
+        if legacy_context or legacy_metadata:
+            context = self._migrate_legacy(context, legacy_context, legacy_metadata)
+        self._context = context
+        self._reset_pending()
+        self._index_tools()
+
+    def _migrate_legacy(
+        self,
+        context: Context,
+        legacy_context: Optional[bytes],
+        legacy_metadata: Optional[bytes],
+    ) -> Context:
+        """Перенос данных из прежних ключей в списки и хеш одним пакетом
+
+        Старые сообщения и инструменты ставятся перед новыми, поля хеша имеют приоритет над старыми.
+        """
+        legacy = Context.model_validate_json(legacy_context) if legacy_context else Context()
+        if legacy_metadata:
+            legacy.metadata.update(orjson.loads(legacy_metadata))
+        missing = {key: value for key, value in legacy.metadata.items() if key not in context.metadata}
+
+        pipe = self.redis.pipeline(transaction=False)
+        # LPUSH в обратном порядке ставит старые записи в начало списка с сохранением порядка
+        if legacy.messages:
+            pipe.lpush(
+                MESSAGES_KEY, *[_dumps(message.model_dump()) for message in reversed(legacy.messages)]
+            )
+        if legacy.tools:
+            pipe.lpush(TOOLS_KEY, *[_dumps(tool.model_dump()) for tool in reversed(legacy.tools)])
+        if missing:
+            pipe.hset(METADATA_KEY, mapping={key: _dumps(value) for key, value in missing.items()})
+        pipe.delete(LEGACY_CONTEXT_KEY, LEGACY_METADATA_KEY)
+        pipe.execute()
+
+        return Context(
+            messages=legacy.messages + context.messages,
+            tools=legacy.tools + context.tools,
+            metadata={**missing, **context.metadata},
+        )
 
     def clear_context(self) -> None:
         """Очистка контекста"""
         self._context = Context()
-        self.redis.delete("mcp:context") 
\ No newline at end of file
+        self._tools_by_name = {}
+        self._reset_pending()
+        self.redis.delete(MESSAGES_KEY, TOOLS_KEY, METADATA_KEY, LEGACY_CONTEXT_KEY, LEGACY_METADATA_KEY)
@@ -4,52 +4,84 @@ Message analyzer for MCP agent.
 
 import logging
 import re
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    # google-re2 (DFA без бэктрекинга), если установлен
+    import re2 as _regex
+except ImportError:
+    _regex = re
 
 from src.models.base import Message
 
 logger = logging.getLogger(__name__)
 
+TOOL_PATTERNS = {
+    "portfolio_info": [
+        r"портфел[ья]",
+        r"позици[ия]",
+        r"баланс",
+        r"состав",
+        r"активы",
+        r"счет[а]?",
+    ],
+    "portfolio_performance": [
+        r"доходност[ьи]",
+        r"результат[ыов]?",
+        r"эффективност[ьи]",
+        r"прибыльност[ьи]",
+        r"показател[ьи]",
+        r"метрик[иа]",
+    ],
+    "portfolio_pnl": [
+        r"прибыл[ьи]",
+        r"убыт[окка]",
+        r"p&?l",
+        r"pnl",
+        r"доход[ыа]?",
+        r"расход[ыа]?",
+    ],
+    "portfolio_cash_flow": [
+        r"поток[иа]?",
+        r"движени[еяй]",
+        r"ввод[ыа]?",
+        r"вывод[ыа]?",
+        r"пополнени[еяй]",
+        r"списани[еяй]",
+    ],
+}
+
+# Одна скомпилированная альтернатива на инструмент вместо поиска по каждому шаблону
+_MATCHERS = {
+    tool_name: _regex.compile("|".join(patterns))
+    for tool_name, patterns in TOOL_PATTERNS.items()
+}
+
+
+@lru_cache(maxsize=4096)
+def _match_tools(content: str) -> Tuple[str, ...]:
+    """Match lowercased message content against tool patterns.
+
+    Args:
+        content: Lowercased message text
+
+    Returns:
+        Names of matched tools in pattern order
+    """
+    return tuple(
+        tool_name
+        for tool_name, matcher in _MATCHERS.items()
+        if matcher.search(content)
+    )
+
 
 class MessageAnalyzer:
     """Analyzer for determining required tools from messages."""
 
     def __init__(self):
         """Initialize message analyzer."""
-        self._patterns = {
-            "portfolio_info": [
-                r"портфел[ья]",
-                r"позици[ия]",
-                r"баланс",
-                r"состав",
-                r"активы",
-                r"счет[а]?",
-            ],
-            "portfolio_performance": [
-                r"доходност[ьи]",
-                r"результат[ыов]?",
-                r"эффективност[ьи]",
-                r"прибыльност[ьи]",
-                r"показател[ьи]",
-                r"метрик[иа]",
-            ],
-            "portfolio_pnl": [
-                r"прибыл[ьи]",
-                r"убыт[окка]",
-                r"p&?l",
-                r"pnl",
-                r"доход[ыа]?",
-                r"расход[ыа]?",
-            ],
-            "portfolio_cash_flow": [
-                r"поток[иа]?",
-                r"движени[еяй]",
-                r"ввод[ыа]?",
-                r"вывод[ыа]?",
-                r"пополнени[еяй]",
-                r"списани[еяй]",
-            ],
-        }
+        self._patterns = TOOL_PATTERNS
         logger.info("Initialized MessageAnalyzer")
 
     def analyze_message(self, message: Message) -> List[str]:
@@ -66,17 +98,12 @@ class MessageAnalyzer:
         # Convert message to lowercase for case-insensitive matching
         content = message.content.lower()
         
-        # Find matching tools
-        tools = []
-        for tool_name, patterns in self._patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, content):
-                    tools.append(tool_name)
-                    break
+        # Find matching tools (повторяющиеся сообщения берутся из кэша)
+        tools = list(_match_tools(content))
         
         if not tools:
             # Default to portfolio info if no specific tools matched
             tools = ["portfolio_info"]
         
         logger.info("Required tools: %s", tools)
-        return tools 
\ No newline at end of file
+        return tools 
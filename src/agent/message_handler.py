@@ -2,6 +2,7 @@
 Message handler for MCP agent.
 """
 
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 
@@ -55,27 +56,11 @@ class MessageHandler:
             tool_names = self.analyzer.analyze_message(message)
             logger.info("Required tools: %s", tool_names)
             
-            # Execute tools
-            tool_results = []
-            for tool_name in tool_names:
-                try:
-                    result = await self.executor.execute(
-                        tool_name=tool_name,
-                        message=message,
-                        context={"context": context},
-                    )
-                    tool_results.append({
-                        "tool": tool_name,
-                        "status": "success",
-                        "result": result,
-                    })
-                except Exception as e:
-                    logger.error("Tool execution failed: %s - %s", tool_name, str(e))
-                    tool_results.append({
-                        "tool": tool_name,
-                        "status": "error",
-                        "error": str(e),
-                    })
+            # Execute tools concurrently (order of results follows tool_names)
+            tool_results = list(await asyncio.gather(*(
+                self._execute_tool(tool_name, message, context)
+                for tool_name in tool_names
+            )))
             
             # Generate response message
             response_message = Message(
@@ -106,6 +91,41 @@ class MessageHandler:
                 context=context,
             )
 
+    async def _execute_tool(
+        self,
+        tool_name: str,
+        message: Message,
+        context: Context,
+    ) -> Dict[str, Any]:
+        """Execute a single tool and wrap its outcome.
+        
+        Args:
+            tool_name: Name of the tool to execute
+            message: Message from the user
+            context: Conversation context
+            
+        Returns:
+            Tool result entry with status
+        """
+        try:
+            result = await self.executor.execute(
+                tool_name=tool_name,
+                message=message,
+                context={"context": context},
+            )
+            return {
+                "tool": tool_name,
+                "status": "success",
+                "result": result,
+            }
+        except Exception as e:
+            logger.error("Tool execution failed: %s - %s", tool_name, str(e))
+            return {
+                "tool": tool_name,
+                "status": "error",
+                "error": str(e),
+            }
+
     def _generate_response(
         self,
         message: Message,
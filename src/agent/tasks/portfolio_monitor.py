@@ -2,10 +2,14 @@
 Background task for monitoring portfolio changes.
 """
 
+import asyncio
 import logging
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from ...services.supabase.token_service import TokenService
 from ...services.supabase.notification_service import NotificationService, NotificationType, NotificationPriority
@@ -13,6 +17,57 @@ from ...services.tinkoff.client import TinkoffClient
 
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True, eq=False)
+class Snapshot:
+    """Immutable portfolio snapshot with positions stored as aligned arrays."""
+    # Слоты объявлены вручную: dataclass(slots=True) доступен только с Python 3.10
+    __slots__ = ('timestamp', 'total_value', 'figis', 'quantities', 'prices', 'yields')
+
+    timestamp: str
+    total_value: float
+    figis: Tuple[str, ...]
+    quantities: np.ndarray
+    prices: np.ndarray
+    yields: np.ndarray
+
+    @classmethod
+    def from_positions(cls, timestamp: str, positions: List[Dict[str, Any]], total_value: Optional[float] = None) -> "Snapshot":
+        """Build snapshot from position dicts (total value is computed if not given)."""
+        count = len(positions)
+        quantities = np.fromiter((pos['quantity'] for pos in positions), dtype=np.float64, count=count)
+        prices = np.fromiter((pos['current_price'] for pos in positions), dtype=np.float64, count=count)
+        yields = np.fromiter((pos['expected_yield'] for pos in positions), dtype=np.float64, count=count)
+        for array in (quantities, prices, yields):
+            array.flags.writeable = False
+        if total_value is None:
+            total_value = float(quantities @ prices)
+        return cls(
+            timestamp=timestamp,
+            total_value=total_value,
+            figis=tuple(pos['figi'] for pos in positions),
+            quantities=quantities,
+            prices=prices,
+            yields=yields,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Snapshot":
+        """Build snapshot from a stored snapshot row."""
+        return cls.from_positions(data['timestamp'], data['positions'], data['total_value'])
+
+    def positions(self) -> List[Dict[str, Any]]:
+        """Positions as dicts (storage format)."""
+        return [
+            {
+                'figi': figi,
+                'quantity': float(quantity),
+                'current_price': float(price),
+                'expected_yield': float(expected_yield)
+            }
+            for figi, quantity, price, expected_yield
+            in zip(self.figis, self.quantities, self.prices, self.yields)
+        ]
+
 class PortfolioMonitor:
     """Portfolio monitoring task."""
 
@@ -27,38 +82,54 @@ class PortfolioMonitor:
         self.notification_service = notification_service
         self.config = config
         self.change_threshold = config.get('change_threshold', 5.0)
+        self.max_concurrent = config.get('max_concurrent', 8)
+        self.max_pool_size = config.get('max_pool_size', 64)
+        # Пул клиентов по user_id (вместе с токеном клиента), чтобы не открывать gRPC-канал на каждый запуск
+        self._client_cache: "OrderedDict[str, Tuple[str, TinkoffClient]]" = OrderedDict()
         self.snapshot_table = 'portfolio_snapshots'
         logger.info("Initialized PortfolioMonitor with threshold %f%%", self.change_threshold)
 
-    async def _get_portfolio_snapshot(self, client: TinkoffClient, account_id: str) -> Dict:
+    def _create_client(self, user_id: str) -> TinkoffClient:
+        """Create Tinkoff client for user."""
+        return TinkoffClient(self.token_service, user_id)
+
+    async def _get_client(self, user_id: str, token: str) -> TinkoffClient:
+        """Get pooled client for user, evicting least recently used ones.
+
+        A client opened with a previous token is closed and replaced.
+        """
+        cached = self._client_cache.get(user_id)
+        if cached is not None:
+            cached_token, client = cached
+            if cached_token == token:
+                self._client_cache.move_to_end(user_id)
+                return client
+            del self._client_cache[user_id]
+            await client.close()
+
+        client = self._create_client(user_id)
+        self._client_cache[user_id] = (token, client)
+        while len(self._client_cache) > self.max_pool_size:
+            _, (_, evicted) = self._client_cache.popitem(last=False)
+            await evicted.close()
+        return client
+
+    async def close(self):
+        """Close all pooled clients."""
+        clients = [client for _, client in self._client_cache.values()]
+        self._client_cache.clear()
+        for client in clients:
+            await client.close()
+
+    async def _get_portfolio_snapshot(self, client: TinkoffClient, account_id: str) -> Snapshot:
         """Get current portfolio snapshot."""
         portfolio = await client.get_portfolio(account_id)
-        
-        # Рассчитываем общую стоимость портфеля
-        total_value = Decimal('0')
-        for position in portfolio['positions']:
-            quantity = position['quantity']
-            current_price = position['current_price']
-            total_value += quantity * current_price
-
-        return {
-            'timestamp': datetime.utcnow().isoformat(),
-            'total_value': float(total_value),
-            'positions': [
-                {
-                    'figi': pos['figi'],
-                    'quantity': float(pos['quantity']),
-                    'current_price': float(pos['current_price']),
-                    'expected_yield': float(pos['expected_yield'])
-                }
-                for pos in portfolio['positions']
-            ]
-        }
+        return Snapshot.from_positions(datetime.utcnow().isoformat(), portfolio['positions'])
 
     async def _calculate_changes(
         self,
-        current: Dict,
-        previous: Optional[Dict]
+        current: Snapshot,
+        previous: Optional[Snapshot]
     ) -> Dict:
         """Calculate portfolio changes."""
         if not previous:
@@ -69,76 +140,87 @@ class PortfolioMonitor:
             }
 
         # Изменение общей стоимости
-        prev_value = previous['total_value']
-        curr_value = current['total_value']
+        prev_value = previous.total_value
+        curr_value = current.total_value
         total_change_percent = ((curr_value - prev_value) / prev_value) * 100
 
         # Изменения в позициях
-        position_changes = []
-        curr_positions = {pos['figi']: pos for pos in current['positions']}
-        prev_positions = {pos['figi']: pos for pos in previous['positions']}
-
-        # Проверяем все текущие позиции
-        for figi, curr_pos in curr_positions.items():
-            prev_pos = prev_positions.get(figi)
-            if prev_pos:
-                # Существующая позиция
-                quantity_change = curr_pos['quantity'] - prev_pos['quantity']
-                price_change_percent = ((curr_pos['current_price'] - prev_pos['current_price']) 
-                                     / prev_pos['current_price'] * 100)
-                
-                if abs(quantity_change) > 0 or abs(price_change_percent) >= self.change_threshold:
-                    position_changes.append({
-                        'figi': figi,
-                        'quantity_change': quantity_change,
-                        'price_change_percent': price_change_percent
-                    })
-            else:
-                # Новая позиция
-                position_changes.append({
-                    'figi': figi,
-                    'quantity_change': curr_pos['quantity'],
-                    'price_change_percent': 0
-                })
+        curr_count = len(current.figis)
+        prev_count = len(previous.figis)
+        prev_index = {figi: i for i, figi in enumerate(previous.figis)}
 
-        # Проверяем закрытые позиции
-        for figi, prev_pos in prev_positions.items():
-            if figi not in curr_positions:
-                position_changes.append({
-                    'figi': figi,
-                    'quantity_change': -prev_pos['quantity'],
-                    'price_change_percent': -100
-                })
+        # Индекс предыдущей позиции для каждой текущей (-1 для новых позиций)
+        prev_idx = np.fromiter(
+            (prev_index.get(figi, -1) for figi in current.figis),
+            dtype=np.intp, count=curr_count
+        )
+        existing = prev_idx >= 0
+
+        # Последний элемент - нулевой заполнитель для новых позиций (индекс -1)
+        prev_qty = np.append(previous.quantities, 0.0)
+        prev_price = np.append(previous.prices, 0.0)
+
+        old_qty = prev_qty[prev_idx]
+        old_price = prev_price[prev_idx]
+        quantity_change = current.quantities - old_qty
+        price_change_percent = np.divide(
+            current.prices - old_price, old_price,
+            out=np.zeros(curr_count), where=old_price != 0
+        ) * 100
+        changed = ~existing | (quantity_change != 0) | (np.abs(price_change_percent) >= self.change_threshold)
+
+        position_changes = [
+            {
+                'figi': current.figis[i],
+                'quantity_change': float(quantity_change[i]),
+                'price_change_percent': float(price_change_percent[i])
+            }
+            for i in np.flatnonzero(changed)
+        ]
+
+        # Закрытые позиции
+        closed = np.ones(prev_count, dtype=bool)
+        closed[prev_idx[existing]] = False
+        position_changes.extend(
+            {
+                'figi': previous.figis[i],
+                'quantity_change': -float(previous.quantities[i]),
+                'price_change_percent': -100
+            }
+            for i in np.flatnonzero(closed)
+        )
 
         return {
             'total_change_percent': total_change_percent,
             'position_changes': position_changes,
-            'significant_changes': abs(total_change_percent) >= self.change_threshold or position_changes
+            'significant_changes': abs(total_change_percent) >= self.change_threshold or bool(position_changes)
         }
 
-    async def _check_risk_alerts(self, snapshot: Dict) -> List[Dict]:
+    async def _check_risk_alerts(self, snapshot: Snapshot) -> List[Dict]:
         """Check for risk management alerts."""
-        alerts = []
-        total_value = snapshot['total_value']
+        total_value = snapshot.total_value
+        weights = (
+            snapshot.quantities * snapshot.prices / total_value * 100
+            if total_value else np.zeros(len(snapshot.figis))
+        )
 
-        for position in snapshot['positions']:
-            position_value = position['quantity'] * position['current_price']
-            position_weight = (position_value / total_value) * 100
+        # Превышение веса позиции (порог концентрации 20%) и большие убытки (порог 10%)
+        concentrated = weights > 20
+        losing = snapshot.yields < -10
 
-            # Проверяем превышение веса позиции
-            if position_weight > 20:  # Порог концентрации 20%
+        alerts = []
+        for i in np.flatnonzero(concentrated | losing):
+            if concentrated[i]:
                 alerts.append({
                     'type': 'concentration',
-                    'figi': position['figi'],
-                    'weight': position_weight
+                    'figi': snapshot.figis[i],
+                    'weight': float(weights[i])
                 })
-
-            # Проверяем большие убытки
-            if position['expected_yield'] < -10:  # Порог убытка 10%
+            if losing[i]:
                 alerts.append({
                     'type': 'loss',
-                    'figi': position['figi'],
-                    'loss_percent': position['expected_yield']
+                    'figi': snapshot.figis[i],
+                    'loss_percent': float(snapshot.yields[i])
                 })
 
         return alerts
@@ -150,9 +232,11 @@ class PortfolioMonitor:
         risk_alerts: List[Dict]
     ):
         """Send notifications about portfolio changes."""
+        notifications = []
+
         # Уведомление об изменении стоимости портфеля
         if abs(changes['total_change_percent']) >= self.change_threshold:
-            await self.notification_service.create_notification({
+            notifications.append({
                 'user_id': user_id,
                 'type': NotificationType.PORTFOLIO_CHANGE,
                 'title': 'Portfolio Value Change',
@@ -166,7 +250,7 @@ class PortfolioMonitor:
         # Уведомления об изменениях в позициях
         for change in changes['position_changes']:
             if abs(change['price_change_percent']) >= self.change_threshold:
-                await self.notification_service.create_notification({
+                notifications.append({
                     'user_id': user_id,
                     'type': NotificationType.PRICE_TARGET,
                     'title': 'Position Price Change',
@@ -178,7 +262,7 @@ class PortfolioMonitor:
         # Уведомления о рисках
         for alert in risk_alerts:
             if alert['type'] == 'concentration':
-                await self.notification_service.create_notification({
+                notifications.append({
                     'user_id': user_id,
                     'type': NotificationType.RISK_ALERT,
                     'title': 'Position Concentration Risk',
@@ -187,7 +271,7 @@ class PortfolioMonitor:
                     'metadata': alert
                 })
             elif alert['type'] == 'loss':
-                await self.notification_service.create_notification({
+                notifications.append({
                     'user_id': user_id,
                     'type': NotificationType.RISK_ALERT,
                     'title': 'Position Loss Alert',
@@ -196,6 +280,9 @@ class PortfolioMonitor:
                     'metadata': alert
                 })
 
+        if notifications:
+            await self.notification_service.create_notifications(notifications)
+
     async def monitor_user_portfolio(self, user_id: str):
         """Monitor portfolio for specific user."""
         try:
@@ -205,8 +292,8 @@ class PortfolioMonitor:
                 logger.warning("No token found for user %s", user_id)
                 return
 
-            # Инициализируем клиент
-            client = TinkoffClient(self.token_service, user_id)
+            # Берем клиент из пула
+            client = await self._get_client(user_id, token)
             
             # Получаем список счетов
             accounts = await client.get_accounts()
@@ -242,14 +329,23 @@ class PortfolioMonitor:
             # Получаем всех пользователей с активными токенами
             active_tokens = await self.token_service.get_all_active_tokens()
             
-            for token in active_tokens:
-                await self.monitor_user_portfolio(token['user_id'])
+            # Мониторим пользователей параллельно, ограничивая число одновременных задач
+            semaphore = asyncio.Semaphore(self.max_concurrent)
+
+            async def monitor_with_limit(user_id: str):
+                async with semaphore:
+                    await self.monitor_user_portfolio(user_id)
+
+            await asyncio.gather(*[
+                monitor_with_limit(token['user_id'])
+                for token in active_tokens
+            ])
                 
             logger.info("Portfolio monitoring completed")
         except Exception as e:
             logger.error("Error during portfolio monitoring: %s", e)
 
-    async def _get_previous_snapshot(self, user_id: str, account_id: str) -> Optional[Dict]:
+    async def _get_previous_snapshot(self, user_id: str, account_id: str) -> Optional[Snapshot]:
         """Get previous portfolio snapshot from database."""
         try:
             # Получаем последний снимок за последние 5 минут
@@ -262,22 +358,22 @@ class PortfolioMonitor:
                 .execute()
 
             if result.data:
-                return result.data[0]
+                return Snapshot.from_dict(result.data[0])
             return None
         except Exception as e:
             logger.error("Error getting previous snapshot: %s", e)
             return None
 
-    async def _save_snapshot(self, user_id: str, account_id: str, snapshot: Dict):
+    async def _save_snapshot(self, user_id: str, account_id: str, snapshot: Snapshot):
         """Save portfolio snapshot to database."""
         try:
             # Сохраняем снимок
             await self.token_service.supabase.table(self.snapshot_table).insert({
                 'user_id': user_id,
                 'account_id': account_id,
-                'timestamp': snapshot['timestamp'],
-                'total_value': snapshot['total_value'],
-                'positions': snapshot['positions']
+                'timestamp': snapshot.timestamp,
+                'total_value': snapshot.total_value,
+                'positions': snapshot.positions()
             }).execute()
 
             # Удаляем старые снимки (старше 24 часов)
@@ -289,7 +385,25 @@ class PortfolioMonitor:
         except Exception as e:
             logger.error("Error saving snapshot: %s", e)
 
+# Монитор живет между запусками задачи, чтобы пул клиентов переиспользовался
+_monitor: Optional[PortfolioMonitor] = None
+
 async def run(token_service: TokenService, notification_service: NotificationService, config: Dict):
-    """Entry point for the background task."""
-    monitor = PortfolioMonitor(token_service, notification_service, config)
-    await monitor.run() 
\ No newline at end of file
+    """Entry point for the background task (reuses the monitor and its client pool across runs)."""
+    global _monitor
+    if (
+        _monitor is None
+        or _monitor.token_service is not token_service
+        or _monitor.notification_service is not notification_service
+        or _monitor.config != config
+    ):
+        await shutdown()
+        _monitor = PortfolioMonitor(token_service, notification_service, config)
+    await _monitor.run()
+
+async def shutdown():
+    """Close the shared monitor and its pooled clients (task shutdown_handler in mcp.yaml)."""
+    global _monitor
+    monitor, _monitor = _monitor, None
+    if monitor is not None:
+        await monitor.close()
@@ -2,19 +2,28 @@
 Portfolio cash flow tool for MCP agent.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 import logging
 
 from src.agent.tools.base import BaseTool
+from src.agent.tools.portfolio.periods import PERIOD_DELTAS
 from src.models.base import Message, Tool, ToolType
-from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount
+from src.services.tinkoff.models import INSTRUMENT_TYPE_BY_VALUE, Currency, InstrumentType
 from src.services.tinkoff.portfolio import PortfolioService
-from src.services.tinkoff.models import OperationType
 
 logger = logging.getLogger(__name__)
 
+# Тип операции API -> тип денежного потока (покупки не учитываются)
+_OPERATION_FLOW_TYPES = {
+    "DIVIDEND": "dividend",
+    "COUPON": "coupon",
+    "SELL": "trade",
+}
+
+VALID_FLOW_TYPES = frozenset({"dividend", "coupon", "trade", "tax", "commission", "all"})
+
 class PortfolioCashFlowTool(BaseTool):
     """Tool for getting portfolio cash flow information."""
     
@@ -86,27 +95,26 @@ class PortfolioCashFlowTool(BaseTool):
         
         return params
 
-    def _get_period_start(self, period: str) -> Optional[datetime]:
-        """Get start datetime for the given period."""
-        now = datetime.now()
-        
-        if period == "day":
-            return now - timedelta(days=1)
-        elif period == "week":
-            return now - timedelta(weeks=1)
-        elif period == "month":
-            return now - timedelta(days=30)
-        elif period == "year":
-            return now - timedelta(days=365)
-        elif period == "all":
+    def _get_period_start(
+        self, period: str, now: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Get start datetime for the given period.
+
+        Args:
+            period: Период расчета
+            now: Момент отсчета (по умолчанию текущее время)
+        """
+        try:
+            delta = PERIOD_DELTAS[period]
+        except KeyError:
+            raise ValueError(f"Invalid period: {period}") from None
+        if delta is None:
             return None
-        else:
-            raise ValueError(f"Invalid period: {period}")
+        return (now or datetime.now()) - delta
 
     def _validate_flow_type(self, flow_type: str) -> None:
         """Validate cash flow type."""
-        valid_types = {"dividend", "coupon", "trade", "tax", "commission", "all"}
-        if flow_type not in valid_types:
+        if flow_type not in VALID_FLOW_TYPES:
             raise ValueError(f"Invalid flow type: {flow_type}")
 
     async def _get_cash_flows(
@@ -116,71 +124,63 @@ class PortfolioCashFlowTool(BaseTool):
         target_currency: Currency,
         instrument_type: Optional[InstrumentType] = None,
         flow_type: Optional[str] = None,
+        now: Optional[datetime] = None,
     ) -> List[Dict[str, Any]]:
         """Get cash flows for the given parameters."""
         operations = await self.portfolio_service.get_operations(
             account_id,
             from_date=period_start,
-            to_date=datetime.now()
+            to_date=now or datetime.now()
         )
         
-        # Filter by instrument type if specified
-        if instrument_type:
-            operations = [op for op in operations if op["instrument_type"] == instrument_type]
+        if flow_type == "all":
+            flow_type = None
             
+        # Один проход: фильтры проверяются до построения записи
         flows = []
         for op in operations:
+            op_flow_type = _OPERATION_FLOW_TYPES.get(op["type"])
+            if op_flow_type is None:  # BUY и прочие операции не являются денежным потоком
+                continue
+            if instrument_type and op["instrument_type"] != instrument_type:
+                continue
+            if flow_type and op_flow_type != flow_type:
+                continue
+            
             flow_data = {
                 "date": op["date"],
                 "instrument_id": op["figi"],
                 "instrument_type": op["instrument_type"],
                 "currency": op.get("currency", "RUB"),
                 "amount": op["payment"],
+                "type": op_flow_type,
             }
-            
-            if op["type"] in ["DIVIDEND", "COUPON"]:
-                flow_data.update({
-                    "type": op["type"].lower(),
-                    "tax": op.get("tax", 0)
-                })
-                flows.append(flow_data)
-            elif op["type"] == "SELL":  # Only include SELL operations, not BUY
-                flow_data.update({
-                    "type": "trade",
-                    "commission": op.get("commission", 0)
-                })
-                flows.append(flow_data)
-                
-        # Filter by flow type if specified
-        if flow_type and flow_type != "all":
-            flows = [f for f in flows if f["type"] == flow_type]
+            if op_flow_type == "trade":
+                flow_data["commission"] = op.get("commission", 0)
+            else:
+                flow_data["tax"] = op.get("tax", 0)
+            flows.append(flow_data)
             
         return flows
 
     def _format_flow(self, flow: Dict[str, Any]) -> Dict[str, Any]:
         """Format cash flow data for output."""
+        currency = flow["currency"]
         formatted = {
             "date": flow["date"].strftime("%Y-%m-%d") if flow["date"] else None,
             "type": flow["type"],
             "instrument_type": flow["instrument_type"],
             "instrument_id": flow["instrument_id"],
-            "amount": {
-                "value": str(flow["amount"]),
-                "currency": flow["currency"]
-            }
+            "amount": {"value": str(flow["amount"]), "currency": currency},
         }
         
-        if flow.get("commission"):
-            formatted["commission"] = {
-                "value": str(flow["commission"]),
-                "currency": flow["currency"]
-            }
+        commission = flow.get("commission")
+        if commission:
+            formatted["commission"] = {"value": str(commission), "currency": currency}
             
-        if flow.get("tax"):
-            formatted["tax"] = {
-                "value": str(flow["tax"]),
-                "currency": flow["currency"]
-            }
+        tax = flow.get("tax")
+        if tax:
+            formatted["tax"] = {"value": str(tax), "currency": currency}
             
         return formatted
 
@@ -201,13 +201,17 @@ class PortfolioCashFlowTool(BaseTool):
 
         # Validate instrument type
         if instrument_type:
-            try:
-                instrument_type = InstrumentType(instrument_type.lower())
-            except ValueError:
+            instrument_type_enum = INSTRUMENT_TYPE_BY_VALUE.get(instrument_type.lower())
+            if instrument_type_enum is None:
                 return {"error": f"Invalid instrument type: {instrument_type}"}
+            instrument_type = instrument_type_enum
 
         # Get period start date
-        period_start = self._get_period_start(period) if period else None
+        if period and period not in PERIOD_DELTAS:
+            return {"error": f"Invalid period: {period}"}
+        # Границы периода считаются один раз на вызов
+        now = datetime.now()
+        period_start = self._get_period_start(period, now) if period else None
 
         # Validate flow type
         if flow_type != "all" and not self._validate_flow_type(flow_type):
@@ -219,18 +223,15 @@ class PortfolioCashFlowTool(BaseTool):
             period_start,
             currency,
             instrument_type,
-            flow_type if flow_type != "all" else None
+            flow_type if flow_type != "all" else None,
+            now
         )
 
-        # Calculate totals
-        total_amount = Decimal("0")
-        total_commission = Decimal("0")
-        total_tax = Decimal("0")
-
-        for flow in flows:
-            total_amount += flow["amount"]
-            total_commission += flow.get("commission", Decimal("0"))
-            total_tax += flow.get("tax", Decimal("0"))
+        # Calculate totals (суммирование в C через sum, точность Decimal сохраняется)
+        zero = Decimal("0")
+        total_amount = sum((flow["amount"] for flow in flows), zero)
+        total_commission = sum((flow["commission"] for flow in flows if "commission" in flow), zero)
+        total_tax = sum((flow["tax"] for flow in flows if "tax" in flow), zero)
 
         result = {
             "flows": flows,
@@ -3,13 +3,16 @@ Portfolio information tool for MCP agent.
 """
 
 import logging
-from typing import Any, Dict, List, Optional
-from datetime import datetime
-from decimal import Decimal
+from typing import Any, Dict, Optional
 
 from src.agent.tools.base import BaseTool
 from src.models.base import Message, Tool, ToolType
-from src.services.tinkoff.models import Currency, InstrumentType, Portfolio, Position, MoneyAmount
+from src.services.tinkoff.models import (
+    CURRENCY_BY_CODE,
+    INSTRUMENT_TYPE_BY_VALUE,
+    Portfolio,
+    Position,
+)
 from src.services.tinkoff.portfolio import PortfolioService
 
 logger = logging.getLogger(__name__)
@@ -68,46 +71,22 @@ class PortfolioInfoTool(BaseTool):
             "figi": position.figi,
             "type": position.instrument_type.value,
             "quantity": str(position.quantity),
-            "average_price": {
-                "value": str(position.average_price.value),
-                "currency": position.average_price.currency.value,
-            },
-            "current_price": {
-                "value": str(position.current_price.value),
-                "currency": position.current_price.currency.value,
-            },
-            "current_value": {
-                "value": str(position.current_value.value),
-                "currency": position.current_value.currency.value,
-            },
-            "expected_yield": {
-                "value": str(position.expected_yield.value),
-                "currency": position.expected_yield.currency.value,
-            },
+            "average_price": position.average_price.to_dict(),
+            "current_price": position.current_price.to_dict(),
+            "current_value": position.current_value.to_dict(),
+            "expected_yield": position.expected_yield.to_dict(),
         }
 
     async def _format_portfolio(self, portfolio: Portfolio) -> Dict[str, Any]:
         """Format portfolio data for output."""
         return {
             "account_id": portfolio.account_id,
-            "total_amount": {
-                "value": str(portfolio.total_amount.value),
-                "currency": portfolio.total_amount.currency.value,
-            },
-            "expected_yield": {
-                "value": str(portfolio.expected_yield.value),
-                "currency": portfolio.expected_yield.currency.value,
-            },
+            "total_amount": portfolio.total_amount.to_dict(),
+            "expected_yield": portfolio.expected_yield.to_dict(),
             "positions": [
-                await self._format_position(pos) for pos in portfolio.positions
-            ],
-            "cash": [
-                {
-                    "value": str(cash.value),
-                    "currency": cash.currency.value,
-                }
-                for cash in portfolio.cash
+                self._format_position(pos) for pos in portfolio.positions
             ],
+            "cash": [cash.to_dict() for cash in portfolio.cash],
             "updated_at": portfolio.updated_at.isoformat(),
         }
 
@@ -164,25 +143,30 @@ class PortfolioInfoTool(BaseTool):
             account_id = accounts[0]
             logger.info("Using first available account: %s", account_id)
             
-        if instrument_type:
-            try:
-                type_enum = InstrumentType(instrument_type.lower())
-                positions = await self.portfolio_service.get_positions_by_type(account_id, type_enum)
+        try:
+            if instrument_type:
+                type_enum = INSTRUMENT_TYPE_BY_VALUE.get(instrument_type.lower())
+                if type_enum is None:
+                    logger.error("Invalid instrument type: %s", instrument_type)
+                    return {"error": f"Invalid instrument type: {instrument_type}"}
+                positions = await self.portfolio_service.get_positions_by_type(
+                    account_id, type_enum
+                )
                 if not positions:
                     logger.warning("No positions found for type %s", instrument_type)
                     return {"error": f"No positions found for type {instrument_type}"}
                 return {
                     "positions": [
-                        await self._format_position(pos) for pos in positions
+                        self._format_position(pos) for pos in positions
                     ]
                 }
-            except ValueError as e:
-                logger.error("Invalid instrument type: %s", instrument_type)
-                return {"error": f"Invalid instrument type: {instrument_type}"}
 
-        portfolio = await self.portfolio_service.get_portfolio(account_id)
-        logger.info("Got portfolio info for account %s", account_id)
-        return await self._format_portfolio(portfolio)
+            portfolio = await self.portfolio_service.get_portfolio(account_id)
+            logger.info("Got portfolio info for account %s", account_id)
+            return await self._format_portfolio(portfolio)
+        except Exception as e:
+            logger.error("Failed to get portfolio info: %s", str(e))
+            return {"error": f"Failed to get portfolio info: {str(e)}"}
 
     async def execute_with_currency(self, account_id: Optional[str] = None, currency: Optional[str] = None) -> Dict[str, Any]:
         logger.info("Executing PortfolioInfoTool with account_id: %s and currency: %s", account_id, currency)
@@ -194,23 +178,24 @@ class PortfolioInfoTool(BaseTool):
             account_id = accounts[0]
             logger.info("Using first available account: %s", account_id)
             
-        if currency:
-            try:
-                currency_enum = Currency(currency.upper())
-                amount = await self.portfolio_service.get_cash_by_currency(account_id, currency_enum)
+        try:
+            if currency:
+                currency_enum = CURRENCY_BY_CODE.get(currency.upper())
+                if currency_enum is None:
+                    logger.error("Invalid currency: %s", currency)
+                    return {"error": f"Invalid currency: {currency}"}
+                amount = await self.portfolio_service.get_cash_by_currency(
+                    account_id, currency_enum
+                )
                 if not amount:
                     logger.warning("No cash found for currency %s", currency)
                     return {"error": f"No cash found for currency {currency}"}
-                return {
-                    "cash": {
-                        "value": str(amount.value),
-                        "currency": amount.currency.value,
-                    }
-                }
-            except ValueError:
-                logger.error("Invalid currency: %s", currency)
-                return {"error": f"Invalid currency: {currency}"}
+                return {"cash": amount.to_dict()}
 
-        portfolio = await self.portfolio_service.get_portfolio(account_id)
-        logger.info("Got portfolio info for account %s", account_id)
-        return await self._format_portfolio(portfolio) 
\ No newline at end of file
+            portfolio = await self.portfolio_service.get_portfolio(account_id)
+            logger.info("Got portfolio info for account %s", account_id)
+            return await self._format_portfolio(portfolio)
+        except Exception as e:
+            logger.error("Failed to get portfolio info: %s", str(e))
+            return {"error": f"Failed to get portfolio info: {str(e)}"}
+ 
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Formatting helpers for portfolio performance metrics.
+"""
+
+
+def format_amount(value: float) -> str:
+    """Format a float64 aggregate for output, rounded to hundredths."""
+    return f"{value:.2f}"
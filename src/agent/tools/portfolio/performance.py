@@ -2,18 +2,30 @@
 Portfolio performance tool for MCP agent.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 import logging
 
 from src.agent.tools.base import BaseTool
+from src.agent.tools.portfolio.metrics import format_amount
+from src.agent.tools.portfolio.periods import PERIOD_DELTAS
 from src.models.base import Message, Tool, ToolType
-from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, Position
+from src.services.tinkoff.models import CURRENCY_BY_CODE, INSTRUMENT_TYPE_BY_VALUE, Currency
 from src.services.tinkoff.portfolio import PortfolioService
 
 logger = logging.getLogger(__name__)
 
+_ZERO = Decimal("0")
+
+
+def _decimal(value: Any) -> Decimal:
+    """Exact value of a position field (Decimal, number or None)."""
+    if value is None:
+        return _ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
 class PortfolioPerformanceTool(BaseTool):
     """Tool for getting portfolio performance information."""
     
@@ -79,22 +91,22 @@ class PortfolioPerformanceTool(BaseTool):
         
         return params
 
-    def _get_period_start(self, period: str) -> Optional[datetime]:
-        """Get start datetime for the given period."""
-        now = datetime.now()
-        
-        if period == "day":
-            return now - timedelta(days=1)
-        elif period == "week":
-            return now - timedelta(weeks=1)
-        elif period == "month":
-            return now - timedelta(days=30)
-        elif period == "year":
-            return now - timedelta(days=365)
-        elif period == "all":
+    def _get_period_start(
+        self, period: str, now: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Get start datetime for the given period.
+
+        Args:
+            period: Период расчета
+            now: Момент отсчета (по умолчанию текущее время)
+        """
+        try:
+            delta = PERIOD_DELTAS[period]
+        except KeyError:
+            raise ValueError(f"Invalid period: {period}") from None
+        if delta is None:
             return None
-        else:
-            raise ValueError(f"Invalid period: {period}")
+        return (now or datetime.now()) - delta
 
     async def _calculate_metrics(
         self,
@@ -102,33 +114,42 @@ class PortfolioPerformanceTool(BaseTool):
         historical_data: Dict[str, List[Dict[str, Any]]],
         target_currency: Currency,
     ) -> Dict[str, Any]:
-        """Calculate performance metrics."""
-        total_value = Decimal("0")
-        total_invested = Decimal("0")
-        total_yield = Decimal("0")
-        
-        for pos in positions:
-            # Calculate current value including NKD for bonds
-            current_value = Decimal(str(pos["current_price"])) * Decimal(str(pos["quantity"]))
-            if "current_nkd" in pos:
-                current_value += Decimal(str(pos["current_nkd"]))
-            
-            # Calculate invested value
-            invested_value = Decimal(str(pos["average_position_price"])) * Decimal(str(pos["quantity"]))
-            if "aci_value" in pos:  # Add accrued interest for bonds
-                invested_value += Decimal(str(pos["aci_value"]))
-            
-            # Get expected yield
-            expected_yield = Decimal(str(pos.get("expected_yield", "0")))
+        """Calculate performance metrics.
+        
+        Args:
+            positions: Current portfolio positions
+            historical_data: Historical portfolio data
+            target_currency: Currency of the reported amounts
             
-            total_value += current_value
-            total_invested += invested_value
-            total_yield += expected_yield
+        Returns:
+            Totals and yield of the positions
+        """
+        # Денежные суммы считаются в Decimal без потери точности,
+        # float64 - только для относительной доходности
+        total_value = sum(
+            (
+                # Current value including NKD for bonds
+                _decimal(pos.get("current_price")) * _decimal(pos.get("quantity"))
+                + _decimal(pos.get("current_nkd"))
+                for pos in positions
+            ),
+            _ZERO,
+        )
+        total_invested = sum(
+            (
+                # Invested value including accrued interest for bonds
+                _decimal(pos.get("average_position_price")) * _decimal(pos.get("quantity"))
+                + _decimal(pos.get("aci_value"))
+                for pos in positions
+            ),
+            _ZERO,
+        )
+        total_yield = sum((_decimal(pos.get("expected_yield")) for pos in positions), _ZERO)
         
         # Calculate relative metrics
-        relative_yield = (total_yield / total_invested) * 100 if total_invested else Decimal("0")
+        relative_yield = float(total_yield) / float(total_invested) * 100 if total_invested else 0.0
         
-        return {
+        metrics = {
             "total_value": {
                 "value": str(total_value),
                 "currency": target_currency.value,
@@ -142,9 +163,11 @@ class PortfolioPerformanceTool(BaseTool):
                     "value": str(total_yield),
                     "currency": target_currency.value,
                 },
-                "relative": str(relative_yield),
+                "relative": format_amount(relative_yield),
             },
         }
+        
+        return metrics
 
     async def execute(self, message: Message, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the tool with given message and context."""
@@ -165,8 +188,12 @@ class PortfolioPerformanceTool(BaseTool):
             logger.info("Using first available account: %s", account_id)
         
         # Get period start date
+        if period not in PERIOD_DELTAS:
+            return {"error": f"Invalid period: {period}"}
         period_start = self._get_period_start(period)
-        target_currency = Currency(currency.upper())
+        target_currency = CURRENCY_BY_CODE.get(currency.upper())
+        if target_currency is None:
+            return {"error": f"Invalid currency: {currency}"}
         
         try:
             # Check if account exists
@@ -191,16 +218,15 @@ class PortfolioPerformanceTool(BaseTool):
         
         # Filter positions by instrument type if needed
         if instrument_type:
-            try:
-                instrument_type_enum = InstrumentType(instrument_type.lower())
-                positions = [
-                    pos for pos in positions
-                    if pos.instrument_type == instrument_type_enum
-                ]
-                if not positions:
-                    return {"error": f"No positions found for type {instrument_type}"}
-            except ValueError:
+            instrument_type_enum = INSTRUMENT_TYPE_BY_VALUE.get(instrument_type.lower())
+            if instrument_type_enum is None:
                 return {"error": f"Invalid instrument type: {instrument_type}"}
+            positions = [
+                pos for pos in positions
+                if pos.instrument_type == instrument_type_enum
+            ]
+            if not positions:
+                return {"error": f"No positions found for type {instrument_type}"}
         
         # Calculate metrics
         metrics = await self._calculate_metrics(
@@ -0,0 +1,15 @@
+"""
+Reporting periods shared by portfolio tools.
+"""
+
+from datetime import timedelta
+from typing import Dict, Optional
+
+# Длительность периода отчета; "all" (None) - без ограничения по дате
+PERIOD_DELTAS: Dict[str, Optional[timedelta]] = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+    "year": timedelta(days=365),
+    "all": None,
+}
@@ -2,18 +2,45 @@
 Portfolio PnL (Profit and Loss) tool for MCP agent.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional
 import logging
 
 from src.agent.tools.base import BaseTool
+from src.agent.tools.portfolio.periods import PERIOD_DELTAS
 from src.models.base import Message, Tool, ToolType
-from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, Position, OperationType
+from src.services.tinkoff.models import INSTRUMENT_TYPE_BY_VALUE, Currency, MoneyAmount, Position
 from src.services.tinkoff.portfolio import PortfolioService
 
 logger = logging.getLogger(__name__)
 
+# Операции, входящие в PnL, и поле с удержанием по ним
+_PNL_DEDUCTIONS = {
+    "DIVIDEND": "tax",
+    "COUPON": "tax",
+    "SELL": "commission",
+}
+
+
+_ZERO = Decimal("0")
+
+
+def _amount(value: Any) -> Decimal:
+    """Exact value of an operation amount (Decimal, MoneyAmount or None)."""
+    if value is None:
+        return _ZERO
+    value = getattr(value, "value", value)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _operation_pnl(op: Dict[str, Any]) -> Decimal:
+    """PnL contribution of one operation: payment less its deduction, zero for other types."""
+    field = _PNL_DEDUCTIONS.get(op["type"])
+    if field is None:
+        return _ZERO
+    return _amount(op["payment"]) - _amount(op.get(field))
+
 class PortfolioPnLTool(BaseTool):
     """Tool for getting portfolio PnL information."""
     
@@ -79,22 +106,22 @@ class PortfolioPnLTool(BaseTool):
         
         return params
 
-    def _get_period_start(self, period: str) -> Optional[datetime]:
-        """Get start datetime for the given period."""
-        now = datetime.now()
-        
-        if period == "day":
-            return now - timedelta(days=1)
-        elif period == "week":
-            return now - timedelta(weeks=1)
-        elif period == "month":
-            return now - timedelta(days=30)
-        elif period == "year":
-            return now - timedelta(days=365)
-        elif period == "all":
+    def _get_period_start(
+        self, period: str, now: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Get start datetime for the given period.
+
+        Args:
+            period: Период расчета
+            now: Момент отсчета (по умолчанию текущее время)
+        """
+        try:
+            delta = PERIOD_DELTAS[period]
+        except KeyError:
+            raise ValueError(f"Invalid period: {period}") from None
+        if delta is None:
             return None
-        else:
-            raise ValueError(f"Invalid period: {period}")
+        return (now or datetime.now()) - delta
 
     async def _calculate_position_pnl(
         self, position: Position, target_currency: Currency
@@ -126,19 +153,10 @@ class PortfolioPnLTool(BaseTool):
             "figi": position.figi,
             "type": position.instrument_type.value,
             "quantity": str(position.quantity),
-            "invested": {
-                "value": str(invested_value.value),
-                "currency": invested_value.currency.value,
-            },
-            "current": {
-                "value": str(current_value.value),
-                "currency": current_value.currency.value,
-            },
+            "invested": invested_value.to_dict(),
+            "current": current_value.to_dict(),
             "pnl": {
-                "absolute": {
-                    "value": str(absolute_pnl.value),
-                    "currency": absolute_pnl.currency.value,
-                },
+                "absolute": absolute_pnl.to_dict(),
                 "relative": str(relative_pnl),
             },
         }
@@ -186,35 +204,31 @@ class PortfolioPnLTool(BaseTool):
 
         # Validate instrument type
         if instrument_type:
-            try:
-                instrument_type = InstrumentType(instrument_type.lower())
-            except ValueError:
+            instrument_type_enum = INSTRUMENT_TYPE_BY_VALUE.get(instrument_type.lower())
+            if instrument_type_enum is None:
                 return {"error": f"Invalid instrument type: {instrument_type}"}
+            instrument_type = instrument_type_enum
 
         # Get period start date
-        period_start = self._get_period_start(period) if period else None
+        if period and period not in PERIOD_DELTAS:
+            return {"error": f"Invalid period: {period}"}
+        # Границы периода считаются один раз на вызов
+        now = datetime.now()
+        period_start = self._get_period_start(period, now) if period else None
 
         try:
             # Get operations
             operations = await self.portfolio_service.get_operations(
                 account_id,
                 from_date=period_start,
-                to_date=datetime.now()
+                to_date=now
             )
 
-            # Filter by instrument type if specified
+            # Filter operations by instrument type if needed
             if instrument_type:
                 operations = [op for op in operations if op["instrument_type"] == instrument_type]
-
-            # Calculate total PnL
-            total_pnl = Decimal("0")
-            for op in operations:
-                if op["type"] == "DIVIDEND":
-                    total_pnl += Decimal(str(op["payment"])) - Decimal(str(op.get("tax", "0")))
-                elif op["type"] == "COUPON":
-                    total_pnl += Decimal(str(op["payment"])) - Decimal(str(op.get("tax", "0")))
-                elif op["type"] == "SELL":
-                    total_pnl += Decimal(str(op["payment"])) - Decimal(str(op.get("commission", "0")))
+            # Суммы Decimal складываются за один проход без потери точности
+            total_pnl = sum((_operation_pnl(op) for op in operations), _ZERO)
 
             result = {
                 "account_id": account_id,
@@ -33,6 +33,32 @@ class NotificationService:
         self.supabase: Client = create_client(supabase_url, supabase_key)
         logger.info("Initialized NotificationService")
 
+    @staticmethod
+    def _build_notification_data(notification: Dict) -> Dict:
+        """Convert notification dict into a row for the notifications table."""
+        # Проверяем тип уведомления
+        if isinstance(notification['type'], NotificationType):
+            notification_type = notification['type'].value
+        else:
+            notification_type = notification['type']
+
+        # Проверяем приоритет
+        priority = notification.get('priority', NotificationPriority.NORMAL)
+        if isinstance(priority, NotificationPriority):
+            priority = priority.value
+
+        return {
+            'user_id': notification['user_id'],
+            'type': notification_type,
+            'title': notification['title'],
+            'message': notification['message'],
+            'priority': priority,
+            'metadata': notification.get('metadata', {}),
+            'created_at': datetime.utcnow().isoformat(),
+            'is_read': False,
+            'is_dismissed': False
+        }
+
     async def create_notification(self, notification: Dict) -> bool:
         """
         Create a new notification.
@@ -47,29 +73,8 @@ class NotificationService:
                 - metadata: Dict (optional)
         """
         try:
-            # Проверяем тип уведомления
-            if isinstance(notification['type'], NotificationType):
-                notification_type = notification['type'].value
-            else:
-                notification_type = notification['type']
-
-            # Проверяем приоритет
-            priority = notification.get('priority', NotificationPriority.NORMAL)
-            if isinstance(priority, NotificationPriority):
-                priority = priority.value
-
             # Формируем данные для вставки
-            notification_data = {
-                'user_id': notification['user_id'],
-                'type': notification_type,
-                'title': notification['title'],
-                'message': notification['message'],
-                'priority': priority,
-                'metadata': notification.get('metadata', {}),
-                'created_at': datetime.utcnow().isoformat(),
-                'is_read': False,
-                'is_dismissed': False
-            }
+            notification_data = self._build_notification_data(notification)
 
             # Создаем уведомление
             result = await self.supabase.table('notifications') \
@@ -81,6 +86,27 @@ class NotificationService:
             logger.error("Error creating notification: %s", e)
             return False
 
+    async def create_notifications(self, notifications: List[Dict]) -> bool:
+        """
+        Create several notifications with a single insert.
+        
+        Args:
+            notifications: List of notification dictionaries (see create_notification)
+        """
+        if not notifications:
+            return True
+        try:
+            rows = [self._build_notification_data(notification) for notification in notifications]
+
+            result = await self.supabase.table('notifications') \
+                .insert(rows) \
+                .execute()
+
+            return bool(result.data)
+        except Exception as e:
+            logger.error("Error creating notifications: %s", e)
+            return False
+
     async def mark_as_read(self, user_id: str, notification_id: str) -> bool:
         """Mark notification as read."""
         try:
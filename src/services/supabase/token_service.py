@@ -32,14 +32,15 @@ class TokenService:
                 logger.error("Failed to encrypt token")
                 return False
 
-            # Проверяем существование токена
+            # Проверяем существование токена (HEAD-запрос: только count, без строк)
             existing = await self.supabase.table('user_tokens') \
-                .select('id') \
+                .select('id', head=True, count='exact') \
                 .eq('user_id', user_id) \
                 .eq('broker_type', broker_type) \
+                .limit(1) \
                 .execute()
 
-            if existing.data:
+            if existing.count:
                 # Обновляем существующий токен
                 result = await self.supabase.table('user_tokens') \
                     .update({
@@ -129,4 +130,4 @@ class TokenService:
             return bool(result.data)
         except Exception as e:
             logger.error("Error updating token validation: %s", e)
-            return False 
\ No newline at end of file
+            return False
@@ -2,7 +2,9 @@
 Cache implementation for Tinkoff API client.
 """
 
+import asyncio
 import time
+from collections import OrderedDict
 from typing import Any, Callable, Dict, Optional, TypeVar
 
 T = TypeVar("T")
@@ -14,14 +16,24 @@ class Cache:
     
     Features:
     - TTL-based invalidation
+    - LRU eviction above max_size entries
     - Hit/miss ratio tracking
-    - Async support
+    - Async support with single-flight get_or_set
     """
 
-    def __init__(self, ttl: int = 300):  # 5 minutes default TTL
+    def __init__(
+        self,
+        ttl: int = 300,  # 5 minutes default TTL
+        max_size: Optional[int] = 1024,
+        time_func: Callable[[], float] = time.monotonic,
+    ):
         self.ttl = ttl
-        self.data: Dict[str, Any] = {}
+        self.max_size = max_size
+        self._now = time_func
+        # Порядок записей - от давно использованных к недавним
+        self.data: "OrderedDict[str, Any]" = OrderedDict()
         self.timestamps: Dict[str, float] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
         
         # Statistics
         self.hits = 0
@@ -31,7 +43,7 @@ class Cache:
         """Check if cache entry is still valid."""
         if key not in self.timestamps:
             return False
-        return time.time() - self.timestamps[key] < self.ttl
+        return self._now() - self.timestamps[key] < self.ttl
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -43,9 +55,13 @@ class Cache:
         Returns:
             Cached value or None if not found or expired
         """
-        if key in self.data and self._is_valid(key):
-            self.hits += 1
-            return self.data[key]
+        if key in self.data:
+            if self._is_valid(key):
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            # Просроченная запись удаляется при обращении
+            self.delete(key)
         
         self.misses += 1
         return None
@@ -59,7 +75,11 @@ class Cache:
             value: Value to cache
         """
         self.data[key] = value
-        self.timestamps[key] = time.time()
+        self.data.move_to_end(key)
+        self.timestamps[key] = self._now()
+        if self.max_size is not None and len(self.data) > self.max_size:
+            oldest, _ = self.data.popitem(last=False)
+            del self.timestamps[oldest]
 
     def delete(self, key: str) -> None:
         """
@@ -77,6 +97,11 @@ class Cache:
         self.data.clear()
         self.timestamps.clear()
 
+    def reset_stats(self) -> None:
+        """Reset hit/miss counters."""
+        self.hits = 0
+        self.misses = 0
+
     async def get_or_set(self, key: str, fetch_func: Callable[[], T]) -> T:
         """
         Get value from cache or fetch and cache it if not found.
@@ -88,11 +113,22 @@ class Cache:
         Returns:
             Cached or fetched value
         """
+        # Конкурентные вызовы ждут уже запущенную загрузку вместо повторного запроса
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
         value = self.get(key)
         if value is not None:
             return value
 
-        value = await fetch_func()
+        pending = asyncio.ensure_future(fetch_func())
+        self._pending[key] = pending
+        try:
+            value = await asyncio.shield(pending)
+        finally:
+            del self._pending[key]
         self.set(key, value)
         return value
 
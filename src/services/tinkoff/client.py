@@ -2,12 +2,18 @@
 Tinkoff Invest API client implementation with Supabase token management.
 """
 
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+import os
+import sys
+import weakref
+from collections import defaultdict
+from itertools import cycle
+from types import TracebackType
+from typing import Optional, Dict, Any, Awaitable, Callable, List, NamedTuple, Tuple, Type
+from datetime import date, datetime, timedelta, timezone
 
 import grpc
-import pytz
 from google.protobuf.timestamp_pb2 import Timestamp
 from tinkoff.invest.grpc.users_pb2_grpc import UsersServiceStub
 from tinkoff.invest.grpc.users_pb2 import GetAccountsRequest
@@ -36,35 +42,97 @@ from tinkoff.invest.grpc.instruments_pb2 import (
 from tinkoff.invest.constants import INVEST_GRPC_API
 from tinkoff.invest.utils import quotation_to_decimal, now
 
-from .exceptions import TinkoffAuthError, TinkoffNetworkError
+from .exceptions import TinkoffAuthError, TinkoffNetworkError, TinkoffTimeoutError
 from ..supabase.token_service import TokenService
 
 logger = logging.getLogger(__name__)
 
+# Ограничения на число одновременных gRPC-вызовов (на процесс и на пользователя)
+MAX_CONCURRENT_CALLS = int(os.getenv("TINKOFF_MAX_CONCURRENT_CALLS", "64"))
+MAX_USER_CONCURRENT_CALLS = int(os.getenv("TINKOFF_MAX_USER_CONCURRENT_CALLS", "8"))
+CALL_TIMEOUT = float(os.getenv("TINKOFF_CALL_TIMEOUT", "30"))
+
+# Keepalive, настройки HTTP/2 flow control и размеры буферов для канала
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30_000),
+    ('grpc.keepalive_timeout_ms', 10_000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.http2.min_time_between_pings_ms', 10_000),
+    ('grpc.http2.initial_window_size', 1024 * 1024),
+    ('grpc.http2.lookahead_bytes', 1024 * 1024),
+    ('grpc.http2.write_buffer_size', 512 * 1024),
+    ('grpc.experimental.tcp_read_chunk_size', 512 * 1024),
+    ('grpc.experimental.tcp_max_read_chunk_size', 1024 * 1024),
+    ('grpc.max_receive_message_length', 32 * 1024 * 1024),
+]
+
+# Число gRPC-каналов в пуле клиента (вызовы распределяются по кругу)
+CHANNEL_POOL_SIZE = int(os.getenv("TINKOFF_CHANNEL_POOL_SIZE", "4"))
+
+# Ширина окна, на которые разбивается запрос операций за длинный период
+OPERATIONS_WINDOW = timedelta(days=7)
+
+# Глобальный семафор создается лениво для каждого event loop: на Python 3.9 он привязывается к loop при создании
+_GLOBAL_SEMS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _global_sem() -> asyncio.Semaphore:
+    """Get the process-wide call semaphore of the running event loop."""
+    loop = asyncio.get_running_loop()
+    sem = _GLOBAL_SEMS.get(loop)
+    if sem is None:
+        sem = _GLOBAL_SEMS[loop] = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    return sem
+
+# Валютные позиции котируются в рублях, поэтому код валюты определяется по FIGI позиции
+CURRENCY_BY_FIGI = {
+    "RUB000UTSTOM": "RUB",
+    "BBG0013HGFT4": "USD",
+    "BBG0013HJJ31": "EUR",
+    "BBG0013HRTL0": "CNY",
+    "BBG0013HSW87": "HKD",
+    "BBG0013HQ5F0": "CHF",
+    "BBG0013HQ524": "JPY",
+}
+
+_UTC = timezone.utc
+_EPOCH = datetime(1970, 1, 1, tzinfo=_UTC)
+
 def _datetime_to_timestamp(dt: datetime) -> Timestamp:
-    """Convert datetime to Protobuf Timestamp."""
+    """Convert datetime to Protobuf Timestamp (naive datetimes are treated as UTC)."""
     if dt.tzinfo is None:
-        dt = pytz.UTC.localize(dt)
-    else:
-        dt = dt.astimezone(pytz.UTC)
+        dt = dt.replace(tzinfo=_UTC)
+    delta = dt - _EPOCH
     ts = Timestamp()
-    ts.FromDatetime(dt)
+    ts.seconds = delta.days * 86400 + delta.seconds
+    ts.nanos = delta.microseconds * 1000
     return ts
 
+class _ServiceStubs(NamedTuple):
+    """Service stubs bound to one channel of the pool."""
+    users: UsersServiceStub
+    operations: OperationsServiceStub
+    market_data: MarketDataServiceStub
+    instruments: InstrumentsServiceStub
+
 class TinkoffClient:
     """
     Client for Tinkoff Invest API using gRPC with Supabase token management.
     """
 
-    def __init__(self, token_service: TokenService, user_id: str):
+    def __init__(self, token_service: TokenService, user_id: str, pool_size: int = CHANNEL_POOL_SIZE):
         """Initialize client with token service and user ID."""
         self.token_service = token_service
         self.user_id = user_id
-        self.channel = None
-        self.users_stub = None
-        self.operations_stub = None
-        self.market_data_stub = None
-        self.instruments_stub = None
+        self.pool_size = pool_size
+        self._channels: List[grpc.aio.Channel] = []
+        self._stubs: List[_ServiceStubs] = []
+        self._rr = cycle(range(pool_size))
+        self._user_sem: Optional[asyncio.Semaphore] = None
+        # Блокировка создается лениво: на Python 3.9 она привязывается к loop при создании
+        self._connect_lock: Optional[asyncio.Lock] = None
+        # Справочник инструментов меняется редко: кэшируем сконвертированный результат на день (UTC)
+        self._instruments_cache: Optional[Tuple[date, Dict[str, List[Dict[str, Any]]]]] = None
         logger.info("Initialized TinkoffClient for user %s", user_id)
 
     async def _ensure_token(self) -> str:
@@ -74,24 +142,63 @@ class TinkoffClient:
             raise TinkoffAuthError("No token found for user")
         return token
 
-    async def _ensure_connection(self):
+    async def _ensure_connection(self) -> None:
         """Ensure gRPC channel and stubs are initialized with valid token."""
-        if not self.channel:
+        if self._channels:
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        # Параллельные вызовы ждут одну настройку соединения, иначе каждый создает свой пул каналов
+        async with self._connect_lock:
+            if self._channels:
+                return
             token = await self._ensure_token()
             self.metadata = (('authorization', f'Bearer {token}'),)
-            self.channel = self._get_channel()
-            self.users_stub = UsersServiceStub(self.channel)
-            self.operations_stub = OperationsServiceStub(self.channel)
-            self.market_data_stub = MarketDataServiceStub(self.channel)
-            self.instruments_stub = InstrumentsServiceStub(self.channel)
+            self._channels = [self._get_channel() for _ in range(self.pool_size)]
+            self._stubs = [
+                _ServiceStubs(
+                    users=UsersServiceStub(channel),
+                    operations=OperationsServiceStub(channel),
+                    market_data=MarketDataServiceStub(channel),
+                    instruments=InstrumentsServiceStub(channel),
+                )
+                for channel in self._channels
+            ]
 
-    def _get_channel(self) -> grpc.Channel:
+    def _get_channel(self) -> grpc.aio.Channel:
         """Get or create gRPC channel."""
-        return grpc.secure_channel(
+        # Локальный пул подканалов, иначе каналы пула делят одно соединение
+        return grpc.aio.secure_channel(
             INVEST_GRPC_API,
-            grpc.ssl_channel_credentials()
+            grpc.ssl_channel_credentials(),
+            options=CHANNEL_OPTIONS + [('grpc.use_local_subchannel_pool', 1)]
         )
 
+    def _next_stubs(self) -> _ServiceStubs:
+        """Pick stubs of the next channel in round-robin order."""
+        return self._stubs[next(self._rr)]
+
+    async def _call(self, method: Callable[..., Awaitable[Any]], request: Any) -> Any:
+        """Run a unary gRPC call within the global and per-user concurrency limits.
+
+        Args:
+            method: Stub method to call
+            request: Request message
+
+        Returns:
+            Response message
+        """
+        if self._user_sem is None:
+            self._user_sem = asyncio.Semaphore(MAX_USER_CONCURRENT_CALLS)
+        async with _global_sem(), self._user_sem:
+            try:
+                return await asyncio.wait_for(
+                    method(request, metadata=self.metadata, timeout=CALL_TIMEOUT),
+                    timeout=CALL_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                raise TinkoffTimeoutError(f"gRPC call timed out after {CALL_TIMEOUT}s")
+
     async def validate_token(self) -> bool:
         """Validate token by making a test API call."""
         try:
@@ -109,7 +216,7 @@ class TinkoffClient:
         await self._ensure_connection()
         logger.info("Getting accounts for user %s", self.user_id)
         try:
-            response = self.users_stub.GetAccounts(GetAccountsRequest(), metadata=self.metadata)
+            response = await self._call(self._next_stubs().users.GetAccounts, GetAccountsRequest())
             accounts = [
                 {
                     "id": account.id,
@@ -134,11 +241,12 @@ class TinkoffClient:
         await self._ensure_connection()
         logger.info("Getting portfolio for account %s", account_id)
         try:
-            response = self.operations_stub.GetPortfolio(
-                PortfolioRequest(account_id=account_id),
-                metadata=self.metadata
+            response = await self._call(
+                self._next_stubs().operations.GetPortfolio,
+                PortfolioRequest(account_id=account_id)
             )
             
+            # Типы инструментов и валюты повторяются во всех записях - интернируем их (sys.intern)
             result = {
                 "total_amount_shares": quotation_to_decimal(response.total_amount_shares),
                 "total_amount_bonds": quotation_to_decimal(response.total_amount_bonds),
@@ -149,8 +257,9 @@ class TinkoffClient:
                 "expected_yield": quotation_to_decimal(response.expected_yield),
                 "positions": [
                     {
-                        "figi": pos.figi,
-                        "instrument_type": str(pos.instrument_type),
+                        "figi": sys.intern(pos.figi),
+                        "instrument_type": sys.intern(str(pos.instrument_type)),
+                        "currency": sys.intern(pos.average_position_price.currency.upper()),
                         "quantity": quotation_to_decimal(pos.quantity),
                         "average_position_price": quotation_to_decimal(pos.average_position_price),
                         "expected_yield": quotation_to_decimal(pos.expected_yield),
@@ -162,6 +271,20 @@ class TinkoffClient:
                     for pos in response.positions
                 ]
             }
+
+            # Индексы для фильтрации по типу инструмента и валюте без повторного прохода
+            positions_by_type = defaultdict(list)
+            cash_by_currency = {}
+            for pos in result["positions"]:
+                positions_by_type[pos["instrument_type"]].append(pos)
+                if pos["instrument_type"] == "currency":
+                    currency = CURRENCY_BY_FIGI.get(pos["figi"])
+                    if currency is None:
+                        logger.debug("Unknown currency FIGI %s", pos["figi"])
+                        continue
+                    cash_by_currency[currency] = cash_by_currency.get(currency, 0) + pos["quantity"]
+            result["positions_by_type"] = dict(positions_by_type)
+            result["cash_by_currency"] = cash_by_currency
             
             logger.info("Got portfolio with %d positions", len(result["positions"]))
             return result
@@ -171,15 +294,132 @@ class TinkoffClient:
                 raise TinkoffAuthError("Invalid or expired token")
             raise TinkoffNetworkError(f"gRPC error: {e.details()}")
 
-    def close(self):
-        """Close gRPC channel."""
-        if self.channel:
-            self.channel.close()
-            self.channel = None
-            self.users_stub = None
-            self.operations_stub = None
-            self.market_data_stub = None
-            self.instruments_stub = None
+    async def get_candles(
+        self,
+        figi: str,
+        from_date: datetime,
+        to_date: datetime,
+        interval: CandleInterval,
+    ) -> List[Dict[str, Any]]:
+        """Get candles for an instrument within [from_date, to_date]."""
+        await self._ensure_connection()
+        logger.info("Getting candles for %s", figi)
+        request = GetCandlesRequest(
+            figi=figi,
+            **{'from': _datetime_to_timestamp(from_date)},
+            to=_datetime_to_timestamp(to_date),
+            interval=interval,
+        )
+        try:
+            response = await self._call(self._next_stubs().market_data.GetCandles, request)
+            return [
+                {
+                    "time": candle.time.ToDatetime() if candle.time else None,
+                    "open": quotation_to_decimal(candle.open),
+                    "high": quotation_to_decimal(candle.high),
+                    "low": quotation_to_decimal(candle.low),
+                    "close": quotation_to_decimal(candle.close),
+                    "volume": candle.volume,
+                    "is_complete": candle.is_complete,
+                }
+                for candle in response.candles
+            ]
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNAUTHENTICATED:
+                await self.token_service.invalidate_token(self.user_id, 'tinkoff')
+                raise TinkoffAuthError("Invalid or expired token")
+            raise TinkoffNetworkError(f"gRPC error: {e.details()}")
+
+    async def _fetch_instruments_raw(self) -> Tuple[SharesResponse, BondsResponse, EtfsResponse]:
+        """Fetch shares, bonds and ETFs catalogs."""
+        await self._ensure_connection()
+        request = InstrumentsRequest(instrument_status=InstrumentStatus.INSTRUMENT_STATUS_BASE)
+        try:
+            return await asyncio.gather(
+                self._call(self._next_stubs().instruments.Shares, request),
+                self._call(self._next_stubs().instruments.Bonds, request),
+                self._call(self._next_stubs().instruments.Etfs, request),
+            )
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNAUTHENTICATED:
+                await self.token_service.invalidate_token(self.user_id, 'tinkoff')
+                raise TinkoffAuthError("Invalid or expired token")
+            raise TinkoffNetworkError(f"gRPC error: {e.details()}")
+
+    async def get_all_instruments(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get shares, bonds and ETFs available for trading (cached for the current UTC day)."""
+        today = datetime.now(_UTC).date()
+        if self._instruments_cache and self._instruments_cache[0] == today:
+            return self._instruments_cache[1]
+
+        logger.info("Getting instruments catalog")
+        shares, bonds, etfs = await self._fetch_instruments_raw()
+        instruments = {
+            "shares": [
+                {
+                    "figi": share.figi,
+                    "ticker": share.ticker,
+                    "name": share.name,
+                    "currency": sys.intern(share.currency),
+                    "sector": share.sector,
+                    "trading_status": str(share.trading_status),
+                    "buy_available": share.buy_available_flag,
+                    "sell_available": share.sell_available_flag,
+                }
+                for share in shares.instruments
+            ],
+            "bonds": [
+                {
+                    "figi": bond.figi,
+                    "ticker": bond.ticker,
+                    "name": bond.name,
+                    "currency": sys.intern(bond.currency),
+                    "nominal": quotation_to_decimal(bond.nominal),
+                    "maturity_date": bond.maturity_date.ToDatetime() if bond.maturity_date else None,
+                    "coupon_quantity_per_year": bond.coupon_quantity_per_year,
+                    "current_aci": quotation_to_decimal(bond.aci_value),
+                }
+                for bond in bonds.instruments
+            ],
+            "etfs": [
+                {
+                    "figi": etf.figi,
+                    "ticker": etf.ticker,
+                    "name": etf.name,
+                    "currency": sys.intern(etf.currency),
+                    "focus_type": etf.focus_type,
+                    "fixed_commission": quotation_to_decimal(etf.fixed_commission),
+                    "rebalancing_freq": etf.rebalancing_freq,
+                }
+                for etf in etfs.instruments
+            ],
+        }
+        logger.info(
+            "Got %d shares, %d bonds, %d ETFs",
+            len(instruments["shares"]), len(instruments["bonds"]), len(instruments["etfs"])
+        )
+        self._instruments_cache = (today, instruments)
+        return instruments
+
+    async def __aenter__(self) -> "TinkoffClient":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all gRPC channels of the pool."""
+        channels = self._channels
+        self._channels = []
+        self._stubs = []
+        self._instruments_cache = None
+        for channel in channels:
+            await channel.close()
 
     async def get_operations(
         self,
@@ -187,35 +427,71 @@ class TinkoffClient:
         from_date: Optional[datetime] = None,
         to_date: Optional[datetime] = None,
     ) -> List[Dict[str, Any]]:
-        """Get operations for specified account."""
+        """Get operations for specified account.
+
+        Wide date ranges are split into OPERATIONS_WINDOW windows that are
+        requested concurrently; operations are de-duplicated by id.
+        """
+        await self._ensure_connection()
         logger.info("Getting operations for account %s", account_id)
-        
+
+        if not from_date or not to_date or to_date - from_date <= OPERATIONS_WINDOW:
+            return await self._get_operations_window(account_id, from_date, to_date)
+
+        windows = []
+        start = from_date
+        while start < to_date:
+            end = min(start + OPERATIONS_WINDOW, to_date)
+            windows.append((start, end))
+            start = end
+
+        results = await asyncio.gather(*[
+            self._get_operations_window(account_id, start, end)
+            for start, end in windows
+        ])
+
+        operations = []
+        seen = set()
+        for window_operations in results:
+            for op in window_operations:
+                if op["id"] not in seen:
+                    seen.add(op["id"])
+                    operations.append(op)
+        return operations
+
+    async def _get_operations_window(
+        self,
+        account_id: str,
+        from_date: Optional[datetime],
+        to_date: Optional[datetime],
+    ) -> List[Dict[str, Any]]:
+        """Get operations for a single date window."""
         request = OperationsRequest(
             account_id=account_id,
             **{'from': _datetime_to_timestamp(from_date) if from_date else None},
             to=_datetime_to_timestamp(to_date) if to_date else None,
         )
         
-        response = self.operations_stub.GetOperations(request, metadata=self.metadata)
+        response = await self._call(self._next_stubs().operations.GetOperations, request)
         
         # Debug: print all available fields
-        if response.operations:
+        if response.operations and logger.isEnabledFor(logging.DEBUG):
             op = response.operations[0]
             if op.trades:
                 trade = op.trades[0]
-                logger.info("OperationTrade fields: %s", dir(trade))
+                logger.debug("OperationTrade fields: %s", dir(trade))
         
         return [
             {
                 "id": op.id,
-                "type": str(op.type),
+                "type": sys.intern(str(op.type)),
                 "date": op.date.ToDatetime() if op.date else None,
-                "figi": op.figi,
-                "instrument_type": str(op.instrument_type),
+                "figi": sys.intern(op.figi),
+                "instrument_type": sys.intern(str(op.instrument_type)),
                 "payment": quotation_to_decimal(op.payment) if op.payment else None,
-                "currency": op.currency,
+                "currency": sys.intern(op.currency),
                 "commission": None,  # Commission is not available in the API response
                 "tax": None,  # Tax is not available in the API response
             }
             for op in response.operations
-        ] 
\ No newline at end of file
+        ]
\ No newline at end of file
@@ -2,12 +2,16 @@
 Data models for Tinkoff API responses.
 """
 
+import sys
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional
+from typing import Annotated, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+
+# Идентификаторы повторяются во многих объектах - храним одну копию строки
+InternedStr = Annotated[str, AfterValidator(sys.intern)]
 
 
 class Currency(str, Enum):
@@ -32,6 +36,11 @@ class InstrumentType(str, Enum):
     FUTURES = "futures"
 
 
+# Поиск по значению без исключений для проверки пользовательского ввода
+CURRENCY_BY_CODE = {currency.value: currency for currency in Currency}
+INSTRUMENT_TYPE_BY_VALUE = {instrument_type.value: instrument_type for instrument_type in InstrumentType}
+
+
 class OperationType(str, Enum):
     """Types of operations."""
     BUY = "buy"
@@ -44,6 +53,7 @@ class OperationType(str, Enum):
 
 class MoneyAmount(BaseModel):
     """Money amount with currency."""
+    model_config = ConfigDict(frozen=True)
     currency: Currency
     value: Decimal = Field(..., description="Amount in currency units")
 
@@ -67,9 +77,14 @@ class MoneyAmount(BaseModel):
             value=self.value - other.value,
         )
 
+    def to_dict(self) -> Dict[str, str]:
+        """Output form of the amount: value as a string plus currency code."""
+        return {"value": str(self.value), "currency": self.currency.value}
+
 
 class Instrument(BaseModel):
     """Financial instrument."""
+    model_config = ConfigDict(frozen=True)
     figi: str = Field(..., description="FIGI identifier")
     ticker: str = Field(..., description="Ticker symbol")
     isin: Optional[str] = Field(None, description="ISIN code")
@@ -82,7 +97,8 @@ class Instrument(BaseModel):
 
 class Position(BaseModel):
     """Portfolio position."""
-    figi: str = Field(..., description="Instrument FIGI")
+    model_config = ConfigDict(frozen=True)
+    figi: InternedStr = Field(..., description="Instrument FIGI")
     instrument_type: InstrumentType = Field(..., description="Instrument type")
     quantity: Decimal = Field(..., description="Number of lots")
     average_price: MoneyAmount = Field(..., description="Average purchase price")
@@ -93,6 +109,7 @@ class Position(BaseModel):
 
 class Portfolio(BaseModel):
     """Investment portfolio."""
+    model_config = ConfigDict(frozen=True)
     account_id: str = Field(..., description="Account identifier")
     total_amount: MoneyAmount = Field(..., description="Total portfolio value")
     positions: List[Position] = Field(default_factory=list, description="Portfolio positions")
@@ -103,10 +120,11 @@ class Portfolio(BaseModel):
 
 class Operation(BaseModel):
     """Portfolio operation."""
+    model_config = ConfigDict(frozen=True)
     id: str = Field(..., description="Operation identifier")
-    account_id: str = Field(..., description="Account identifier")
+    account_id: InternedStr = Field(..., description="Account identifier")
     type: OperationType = Field(..., description="Operation type")
-    instrument_id: str = Field(..., description="Instrument identifier")
+    instrument_id: InternedStr = Field(..., description="Instrument identifier")
     instrument_type: InstrumentType = Field(..., description="Instrument type")
     date: datetime = Field(..., description="Operation date")
     amount: Decimal = Field(..., description="Operation amount")
@@ -2,27 +2,85 @@
 Portfolio service implementation for Tinkoff Invest.
 """
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Any, Tuple, Union
 
+from .cache import Cache
 from .client import TinkoffClient
-from .models import Currency, InstrumentType, MoneyAmount, Position, Portfolio
+from .models import CURRENCY_BY_CODE, Currency, InstrumentType, MoneyAmount, Position
 
 logger = logging.getLogger(__name__)
 
+# Названия типов инструментов в ответе API, отличающиеся от InstrumentType
+_API_INSTRUMENT_TYPES = {
+    InstrumentType.STOCK: "share",
+}
+
+def _to_position(data: Dict[str, Any], instrument_type: InstrumentType) -> Optional[Position]:
+    """Build a Position model from a position dict of TinkoffClient.get_portfolio."""
+    currency = CURRENCY_BY_CODE.get(data["currency"])
+    if currency is None:
+        logger.warning("Unsupported currency %s of position %s", data["currency"], data["figi"])
+        return None
+    current_value = data["current_price"] * data["quantity"] + (data["current_nkd"] or 0)
+    return Position(
+        figi=data["figi"],
+        instrument_type=instrument_type,
+        quantity=data["quantity"],
+        average_price=MoneyAmount(currency=currency, value=data["average_position_price"]),
+        current_price=MoneyAmount(currency=currency, value=data["current_price"]),
+        current_value=MoneyAmount(currency=currency, value=current_value),
+        expected_yield=MoneyAmount(currency=currency, value=data["expected_yield"]),
+    )
+
+def _floor_to_minute(value: Optional[datetime]) -> Optional[datetime]:
+    """Truncate datetime to minutes so nearby request windows share a cache key."""
+    return value.replace(second=0, microsecond=0) if value else None
+
 class PortfolioService:
     """Service for working with portfolio data from Tinkoff Invest."""
 
-    def __init__(self, client: TinkoffClient):
-        """Initialize service with API client."""
+    def __init__(self, client: TinkoffClient, accounts_ttl: int = 60, data_ttl: Optional[int] = None):
+        """Initialize service with API client.
+
+        Args:
+            client: Tinkoff API client
+            accounts_ttl: How long the accounts list is cached, in seconds
+            data_ttl: How long portfolio and operations results are cached, in seconds
+                (None - only concurrent in-flight requests are shared)
+        """
         self.client = client
+        self._accounts_cache = Cache(ttl=accounts_ttl)
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._results: Optional[Cache] = Cache(ttl=data_ttl) if data_ttl else None
         logger.info("Initialized PortfolioService")
 
+    async def _shared(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch once per key for concurrent callers (and cache the result if data_ttl is set)."""
+        if self._results is not None:
+            cached = self._results.get(key)
+            if cached is not None:
+                return cached
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await task
+
+    def _finish(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        """Drop a finished request, keeping a newer one stored under the same key."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if self._results is not None and not task.cancelled() and task.exception() is None:
+            self._results.set(key, task.result())
+
     async def get_accounts(self) -> List[Dict]:
         """Get list of user's brokerage accounts."""
         logger.info("Getting accounts")
-        accounts = await self.client.get_accounts()
+        accounts = await self._accounts_cache.get_or_set("accounts", self.client.get_accounts)
         logger.info("Found %d accounts", len(accounts))
         return accounts
 
@@ -32,7 +90,10 @@ class PortfolioService:
         # If account_id is a dict, extract the ID
         if isinstance(account_id, dict):
             account_id = account_id["id"]
-        portfolio = await self.client.get_portfolio(account_id)
+        portfolio = await self._shared(
+            ("portfolio", account_id),
+            lambda: self.client.get_portfolio(account_id)
+        )
         logger.info("Got portfolio with %d positions", len(portfolio["positions"]))
         return portfolio
 
@@ -49,15 +110,39 @@ class PortfolioService:
         if isinstance(account_id, dict):
             account_id = account_id["id"]
         
-        operations = await self.client.get_operations(
-            account_id=account_id,
-            from_date=from_date,
-            to_date=to_date,
+        operations = await self._shared(
+            ("operations", account_id, _floor_to_minute(from_date), _floor_to_minute(to_date)),
+            lambda: self.client.get_operations(
+                account_id=account_id,
+                from_date=from_date,
+                to_date=to_date,
+            )
         )
         
         return operations
 
-    async def get_position(self, account_id: str, figi: str) -> Optional[Position]:
+    async def get_bundle(
+        self,
+        account_id: Union[str, Dict[str, Any]],
+        from_date: Optional[datetime] = None,
+    ) -> Tuple[Dict, List[Dict[str, Any]]]:
+        """
+        Get portfolio and operations for the account concurrently.
+
+        Args:
+            account_id: Broker account ID
+            from_date: Start date for operations
+
+        Returns:
+            Tuple of portfolio and operations
+        """
+        portfolio, operations = await asyncio.gather(
+            self.get_portfolio(account_id),
+            self.get_operations(account_id, from_date=from_date),
+        )
+        return portfolio, operations
+
+    async def get_position(self, account_id: str, figi: str) -> Optional[Dict[str, Any]]:
         """
         Get specific position from portfolio.
 
@@ -69,8 +154,8 @@ class PortfolioService:
             Position information or None if not found
         """
         portfolio = await self.get_portfolio(account_id)
-        for position in portfolio.positions:
-            if position.figi == figi:
+        for position in portfolio["positions"]:
+            if position["figi"] == figi:
                 return position
         return None
 
@@ -90,10 +175,12 @@ class PortfolioService:
             List of positions
         """
         portfolio = await self.get_portfolio(account_id)
-        return [
-            position for position in portfolio.positions
-            if position.instrument_type == instrument_type
-        ]
+        api_type = _API_INSTRUMENT_TYPES.get(instrument_type, instrument_type.value)
+        positions = (
+            _to_position(data, instrument_type)
+            for data in portfolio["positions_by_type"].get(api_type, [])
+        )
+        return [position for position in positions if position is not None]
 
     async def get_cash_by_currency(
         self,
@@ -111,7 +198,7 @@ class PortfolioService:
             Money amount or None if no cash in specified currency
         """
         portfolio = await self.get_portfolio(account_id)
-        for amount in portfolio.cash:
-            if amount.currency == currency:
-                return amount
-        return None 
\ No newline at end of file
+        value = portfolio["cash_by_currency"].get(currency.value)
+        if value is None:
+            return None
+        return MoneyAmount(currency=currency, value=value) 
\ No newline at end of file
@@ -1,6 +1,12 @@
+import asyncio
+import inspect
 import os
+import pickle
 import logging
+import time
 from datetime import datetime, timedelta
+from functools import wraps
+from pathlib import Path
 from dotenv import load_dotenv
 
 from src.services.tinkoff.client import TinkoffClient
@@ -12,7 +18,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+CACHE_DIR = Path("~/.cache/tinkoff").expanduser()
+
+def _cache_path(name):
+    return CACHE_DIR / f"{name}-{datetime.now():%Y%m%d}.pkl"
+
+def _load_cached(name, ttl):
+    path = _cache_path(name)
+    if path.exists() and time.time() - path.stat().st_mtime < ttl:
+        logger.info(f"Loading {name} from cache {path}")
+        with path.open("rb") as f:
+            return True, pickle.load(f)
+    return False, None
+
+def _store_cached(name, result):
+    path = _cache_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        pickle.dump(result, f)
+
+def memoize_to_disk(name, ttl=86400):
+    """Cache function result in a daily pickle file.
+
+    Coroutine functions are awaited before caching, so the pickle holds
+    their result rather than the coroutine object.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                hit, result = _load_cached(name, ttl)
+                if not hit:
+                    result = await func(*args, **kwargs)
+                    _store_cached(name, result)
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            hit, result = _load_cached(name, ttl)
+            if not hit:
+                result = func(*args, **kwargs)
+                _store_cached(name, result)
+            return result
+        return wrapper
+    return decorator
+
+async def main():
     # Load environment variables
     load_dotenv()
     token = os.getenv('TINKOFF_TOKEN')
@@ -27,7 +79,7 @@ def main():
     
     try:
         # Get all instruments
-        instruments = client.get_all_instruments()
+        instruments = await memoize_to_disk("instruments")(client.get_all_instruments)()
         
         # Print summary
         logger.info("=== Available Instruments Summary ===")
@@ -74,7 +126,7 @@ def main():
     except Exception as e:
         logger.error(f"Error: {e}")
     finally:
-        client.close()
+        await client.close()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -21,55 +21,46 @@ async def main():
         raise ValueError("TINKOFF_TOKEN not found in environment variables")
     
     print("Initializing client with token:", token[:10] + "..." + token[-10:])
-    client = TinkoffClient(token)
-    portfolio_service = PortfolioService(client)
-    
-    # Initialize tools
-    info_tool = PortfolioInfoTool(portfolio_service)
-    pnl_tool = PortfolioPnLTool(portfolio_service)
-    performance_tool = PortfolioPerformanceTool(portfolio_service)
-    cash_flow_tool = PortfolioCashFlowTool(portfolio_service)
-    
-    try:
+    async with TinkoffClient(token) as client:
+        portfolio_service = PortfolioService(client)
+        
+        # Initialize tools
+        info_tool = PortfolioInfoTool(portfolio_service)
+        pnl_tool = PortfolioPnLTool(portfolio_service)
+        performance_tool = PortfolioPerformanceTool(portfolio_service)
+        cash_flow_tool = PortfolioCashFlowTool(portfolio_service)
+        
         # Get accounts
         accounts = await portfolio_service.get_accounts()
         print(f"\nFound {len(accounts)} account(s)")
         
-        for account in accounts:
+        start_date = datetime.now() - timedelta(days=30)
+
+        async def process(account):
+            info, pnl, performance, cash_flows = await asyncio.gather(
+                info_tool.execute(account_id=account),
+                pnl_tool.execute(account_id=account, from_date=start_date),
+                performance_tool.execute(account_id=account, period="month"),
+                cash_flow_tool.execute(account_id=account, from_date=start_date),
+            )
+            return account, info, pnl, performance, cash_flows
+
+        results = await asyncio.gather(*(process(account) for account in accounts))
+
+        for account, info, pnl, performance, cash_flows in results:
             print(f"\n=== Account {account} ===")
             
-            # Get portfolio info
             print("\n--- Portfolio Info ---")
-            info = await info_tool.execute(account_id=account)
             print(info)
             
-            # Get PnL for last month
             print("\n--- PnL (Last Month) ---")
-            start_date = datetime.now() - timedelta(days=30)
-            pnl = await pnl_tool.execute(
-                account_id=account,
-                from_date=start_date
-            )
             print(pnl)
             
-            # Get performance metrics
             print("\n--- Performance Metrics ---")
-            performance = await performance_tool.execute(
-                account_id=account,
-                period="month"
-            )
             print(performance)
             
-            # Get cash flows
             print("\n--- Cash Flows (Last Month) ---")
-            cash_flows = await cash_flow_tool.execute(
-                account_id=account,
-                from_date=start_date
-            )
             print(cash_flows)
-            
-    finally:
-        await client.close()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,3 +1,5 @@
+import asyncio
+import itertools
 import logging
 from datetime import datetime, timedelta
 import os
@@ -14,7 +16,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+async def get_all_candles_parallel(client, figi, start, end, interval, chunks=4):
+    """Fetch candles for [start, end] as `chunks` concurrent sub-range requests."""
+    chunk = (end - start) / chunks
+    ranges = [(start + i * chunk, start + (i + 1) * chunk) for i in range(chunks)]
+    results = await asyncio.gather(*[
+        client.get_candles(figi, s, e, interval)
+        for s, e in ranges
+    ])
+    return list(itertools.chain.from_iterable(results))
+
+async def main():
     # Load environment variables
     load_dotenv()
     
@@ -30,7 +42,7 @@ def main():
     client = TinkoffClient(token)
     try:
         # Get accounts to find instruments
-        accounts = client.get_accounts()
+        accounts = await client.get_accounts()
         logger.info(f"Found {len(accounts)} accounts")
         
         if not accounts:
@@ -39,7 +51,7 @@ def main():
             
         # Use first account to get portfolio
         account_id = accounts[0]['id']
-        portfolio = client.get_portfolio(account_id)
+        portfolio = await client.get_portfolio(account_id)
         logger.info(f"Got portfolio with {len(portfolio['positions'])} positions")
         
         if not portfolio['positions']:
@@ -59,12 +71,15 @@ def main():
         ]
         
         end_date = datetime.now()
-        for interval, name in intervals:
-            # Get data for last 7 days
-            start_date = end_date - timedelta(days=7)
-            logger.info(f"Getting {name} candles from {start_date} to {end_date}")
-            
-            candles = client.get_candles(figi, start_date, end_date, interval)
+        # Get data for last 7 days, all intervals concurrently
+        start_date = end_date - timedelta(days=7)
+        logger.info(f"Getting candles from {start_date} to {end_date}")
+        results = await asyncio.gather(*[
+            client.get_candles(figi, start_date, end_date, interval)
+            for interval, _ in intervals
+        ])
+        
+        for (interval, name), candles in zip(intervals, results):
             logger.info(f"Got {len(candles)} {name} candles")
             
             if candles:
@@ -75,7 +90,8 @@ def main():
         start_date = end_date - timedelta(days=30)
         logger.info(f"Getting all daily candles from {start_date} to {end_date}")
         
-        all_candles = client.get_all_candles(
+        all_candles = await get_all_candles_parallel(
+            client,
             figi, 
             start_date, 
             end_date,
@@ -84,7 +100,7 @@ def main():
         logger.info(f"Got {len(all_candles)} daily candles in total")
         
     finally:
-        client.close()
+        await client.close()
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -4,6 +4,7 @@ This script demonstrates how to use the portfolio tools as an end user.
 """
 
 import asyncio
+from functools import lru_cache
 from datetime import datetime
 from decimal import Decimal
 
@@ -15,94 +16,111 @@ from src.agent.tools.portfolio.performance import PortfolioPerformanceTool
 from src.agent.tools.portfolio.pnl import PortfolioPnLTool
 from src.agent.tools.portfolio.cash_flow import PortfolioCashFlowTool
 
+DEMO_ACCOUNT = "demo_account"
+
+# Demo data is built once at import; the mock coroutines return it as is.
+_POSITIONS = (
+    Position(
+        figi="AAPL",
+        instrument_type=InstrumentType.STOCK,
+        quantity=Decimal("10"),
+        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+        current_price=MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
+        current_value=MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
+        expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("52.50")),
+    ),
+    Position(
+        figi="BOND1",
+        instrument_type=InstrumentType.BOND,
+        quantity=Decimal("5"),
+        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("1000.00")),
+        current_price=MoneyAmount(currency=Currency.USD, value=Decimal("1020.00")),
+        current_value=MoneyAmount(currency=Currency.USD, value=Decimal("5100.00")),
+        expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("100.00")),
+    ),
+)
+
+_OPERATIONS = (
+    Operation(
+        id="op1",
+        account_id=DEMO_ACCOUNT,
+        type=OperationType.DIVIDEND,
+        instrument_id="AAPL",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 20),
+        amount=Decimal("25.00"),
+        currency=Currency.USD,
+        tax=Decimal("3.75")
+    ),
+    Operation(
+        id="op2",
+        account_id=DEMO_ACCOUNT,
+        type=OperationType.COUPON,
+        instrument_id="BOND1",
+        instrument_type=InstrumentType.BOND,
+        date=datetime(2024, 1, 25),
+        amount=Decimal("250.00"),
+        currency=Currency.USD,
+        tax=Decimal("32.50")
+    ),
+    Operation(
+        id="op3",
+        account_id=DEMO_ACCOUNT,
+        type=OperationType.SELL,
+        instrument_id="MSFT",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 15),
+        amount=Decimal("777.50"),
+        currency=Currency.USD,
+        commission=Decimal("7.50")
+    ),
+)
+
+_HISTORICAL = {
+    "AAPL": [
+        {
+            "date": datetime(2024, 1, 1),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+        },
+        {
+            "date": datetime(2024, 1, 15),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
+        },
+    ],
+    "BOND1": [
+        {
+            "date": datetime(2024, 1, 1),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("1000.00")),
+        },
+        {
+            "date": datetime(2024, 1, 15),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("1020.00")),
+        },
+    ],
+}
+
+@lru_cache(maxsize=8)
+def _operations_for(account_id):
+    """Demo operations bound to the given account."""
+    return tuple(
+        op if op.account_id == account_id else op.copy(update={"account_id": account_id})
+        for op in _OPERATIONS
+    )
+
 class MockPortfolioService:
     """Mock service for demonstration purposes."""
     
     async def get_accounts(self):
-        return ["demo_account"]
+        return [DEMO_ACCOUNT]
     
     async def get_positions(self, account_id):
-        return [
-            Position(
-                figi="AAPL",
-                instrument_type=InstrumentType.STOCK,
-                quantity=Decimal("10"),
-                average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-                current_price=MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-                current_value=MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
-                expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("52.50")),
-            ),
-            Position(
-                figi="BOND1",
-                instrument_type=InstrumentType.BOND,
-                quantity=Decimal("5"),
-                average_price=MoneyAmount(currency=Currency.USD, value=Decimal("1000.00")),
-                current_price=MoneyAmount(currency=Currency.USD, value=Decimal("1020.00")),
-                current_value=MoneyAmount(currency=Currency.USD, value=Decimal("5100.00")),
-                expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("100.00")),
-            ),
-        ]
+        return list(_POSITIONS)
     
     async def get_operations(self, account_id, from_date=None):
-        return [
-            Operation(
-                id="op1",
-                account_id=account_id,
-                type=OperationType.DIVIDEND,
-                instrument_id="AAPL",
-                instrument_type=InstrumentType.STOCK,
-                date=datetime(2024, 1, 20),
-                amount=Decimal("25.00"),
-                currency=Currency.USD,
-                tax=Decimal("3.75")
-            ),
-            Operation(
-                id="op2",
-                account_id=account_id,
-                type=OperationType.COUPON,
-                instrument_id="BOND1",
-                instrument_type=InstrumentType.BOND,
-                date=datetime(2024, 1, 25),
-                amount=Decimal("250.00"),
-                currency=Currency.USD,
-                tax=Decimal("32.50")
-            ),
-            Operation(
-                id="op3",
-                account_id=account_id,
-                type=OperationType.SELL,
-                instrument_id="MSFT",
-                instrument_type=InstrumentType.STOCK,
-                date=datetime(2024, 1, 15),
-                amount=Decimal("777.50"),
-                currency=Currency.USD,
-                commission=Decimal("7.50")
-            ),
-        ]
+        return list(_operations_for(account_id))
 
     async def get_historical_data(self, account_id):
-        return {
-            "AAPL": [
-                {
-                    "date": datetime(2024, 1, 1),
-                    "close": MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-                },
-                {
-                    "date": datetime(2024, 1, 15),
-                    "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-                },
-            ],
-            "BOND1": [
-                {
-                    "date": datetime(2024, 1, 1),
-                    "close": MoneyAmount(currency=Currency.USD, value=Decimal("1000.00")),
-                },
-                {
-                    "date": datetime(2024, 1, 15),
-                    "close": MoneyAmount(currency=Currency.USD, value=Decimal("1020.00")),
-                },
-            ],
-        }
+        return _HISTORICAL
 
 async def main():
     """Run example usage of portfolio tools."""
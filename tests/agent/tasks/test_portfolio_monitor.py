@@ -1,11 +1,12 @@
 """Tests for portfolio monitoring task."""
 
+import dataclasses
 import pytest
 from datetime import datetime, timedelta
 from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.agent.tasks.portfolio_monitor import PortfolioMonitor
+from src.agent.tasks.portfolio_monitor import PortfolioMonitor, Snapshot
 from src.services.supabase.notification_service import NotificationType, NotificationPriority
 
 @pytest.fixture
@@ -35,7 +36,7 @@ def monitor(token_service, notification_service, config):
 @pytest.fixture
 def portfolio_snapshot():
     """Sample portfolio snapshot."""
-    return {
+    return Snapshot.from_dict({
         'timestamp': datetime.utcnow().isoformat(),
         'total_value': 1000000.0,
         'positions': [
@@ -52,7 +53,7 @@ def portfolio_snapshot():
                 'expected_yield': -12.0
             }
         ]
-    }
+    })
 
 @pytest.mark.asyncio
 async def test_get_portfolio_snapshot(monitor):
@@ -71,10 +72,9 @@ async def test_get_portfolio_snapshot(monitor):
     
     snapshot = await monitor._get_portfolio_snapshot(client, 'test_account')
     
-    assert snapshot['total_value'] == 15000.0
-    assert len(snapshot['positions']) == 1
-    assert snapshot['positions'][0]['figi'] == 'BBG000B9XRY4'
-    assert snapshot['positions'][0]['quantity'] == 100.0
+    assert snapshot.total_value == 15000.0
+    assert snapshot.figis == ('BBG000B9XRY4',)
+    assert snapshot.quantities[0] == 100.0
 
 @pytest.mark.asyncio
 async def test_calculate_changes_new_portfolio(monitor, portfolio_snapshot):
@@ -88,8 +88,7 @@ async def test_calculate_changes_new_portfolio(monitor, portfolio_snapshot):
 @pytest.mark.asyncio
 async def test_calculate_changes_with_significant_change(monitor, portfolio_snapshot):
     """Test calculating changes with significant price change."""
-    previous = portfolio_snapshot.copy()
-    previous['total_value'] = 900000.0
+    previous = dataclasses.replace(portfolio_snapshot, total_value=900000.0)
     
     changes = await monitor._calculate_changes(portfolio_snapshot, previous)
     
@@ -132,11 +131,12 @@ async def test_notify_changes(monitor, portfolio_snapshot):
     await monitor._notify_changes('test_user', changes, risk_alerts)
     
     # Проверяем, что были отправлены нужные уведомления
-    calls = monitor.notification_service.create_notification.call_args_list
-    assert len(calls) == 3  # Portfolio change + position change + risk alert
+    monitor.notification_service.create_notifications.assert_called_once()
+    notifications = monitor.notification_service.create_notifications.call_args.args[0]
+    assert len(notifications) == 3  # Portfolio change + position change + risk alert
     
     # Проверяем уведомление об изменении портфеля
-    portfolio_notification = calls[0].args[0]
+    portfolio_notification = notifications[0]
     assert portfolio_notification['type'] == NotificationType.PORTFOLIO_CHANGE
     assert portfolio_notification['priority'] == NotificationPriority.NORMAL
 
@@ -149,11 +149,11 @@ async def test_monitor_user_portfolio(monitor, portfolio_snapshot):
     client = AsyncMock()
     client.get_accounts.return_value = [{'id': 'test_account'}]
     client.get_portfolio.return_value = {
-        'positions': portfolio_snapshot['positions']
+        'positions': portfolio_snapshot.positions()
     }
     
-    with patch('src.agent.tasks.portfolio_monitor.TinkoffClient', return_value=client):
-        await monitor.monitor_user_portfolio('test_user')
+    monitor._create_client = MagicMock(return_value=client)
+    await monitor.monitor_user_portfolio('test_user')
     
     # Проверяем, что снимок был сохранен
     assert monitor.token_service.supabase.table.call_args.args[0] == 'portfolio_snapshots'
@@ -174,4 +174,54 @@ async def test_run(monitor):
     # Проверяем, что мониторинг был запущен для каждого пользователя
     assert monitor.monitor_user_portfolio.call_count == 2
     monitor.monitor_user_portfolio.assert_any_call('test_user1')
-    monitor.monitor_user_portfolio.assert_any_call('test_user2') 
\ No newline at end of file
+    monitor.monitor_user_portfolio.assert_any_call('test_user2')
+
+
+@pytest.mark.asyncio
+async def test_client_pool_reuses_and_evicts(token_service, notification_service):
+    """Test that clients are reused per user and evicted when the pool is full."""
+    monitor = PortfolioMonitor(token_service, notification_service, {'max_pool_size': 1})
+    monitor._create_client = MagicMock(side_effect=lambda user_id: AsyncMock())
+    
+    first = await monitor._get_client('user1', 'token1')
+    assert await monitor._get_client('user1', 'token1') is first
+    
+    await monitor._get_client('user2', 'token2')
+    
+    assert monitor._create_client.call_count == 2
+    first.close.assert_awaited_once()
+    assert 'user1' not in monitor._client_cache
+
+
+@pytest.mark.asyncio
+async def test_client_pool_replaces_client_on_token_change(token_service, notification_service):
+    """Test that a rotated token closes the user's old client instead of keeping it pooled."""
+    monitor = PortfolioMonitor(token_service, notification_service, {})
+    monitor._create_client = MagicMock(side_effect=lambda user_id: AsyncMock())
+    
+    first = await monitor._get_client('user1', 'token1')
+    second = await monitor._get_client('user1', 'token2')
+    
+    assert second is not first
+    first.close.assert_awaited_once()
+    assert monitor._client_cache == {'user1': ('token2', second)}
+
+
+@pytest.mark.asyncio
+async def test_entry_point_keeps_monitor_between_runs(token_service, notification_service, config):
+    """Test that the task entry point reuses one monitor and its pool across runs."""
+    from src.agent.tasks import portfolio_monitor
+    
+    with patch.object(PortfolioMonitor, 'run', AsyncMock()), \
+            patch.object(PortfolioMonitor, 'close', AsyncMock()) as close:
+        await portfolio_monitor.run(token_service, notification_service, config)
+        monitor = portfolio_monitor._monitor
+        await portfolio_monitor.run(token_service, notification_service, config)
+        
+        assert portfolio_monitor._monitor is monitor
+        close.assert_not_awaited()
+        
+        await portfolio_monitor.shutdown()
+        
+        assert portfolio_monitor._monitor is None
+        close.assert_awaited_once()
@@ -17,7 +17,7 @@ def test_add_message(context_manager, sample_message, redis_mock):
     
     assert len(context_manager.context.messages) == 1
     assert context_manager.context.messages[0] == sample_message
-    redis_mock.set.assert_called_once()
+    assert redis_mock.calls["rpush"] == 1
 
 
 def test_add_tool(context_manager, sample_tool, redis_mock):
@@ -26,7 +26,7 @@ def test_add_tool(context_manager, sample_tool, redis_mock):
     
     assert len(context_manager.context.tools) == 1
     assert context_manager.context.tools[0] == sample_tool
-    redis_mock.set.assert_called_once()
+    assert redis_mock.calls["rpush"] == 1
 
 
 def test_update_metadata(context_manager, redis_mock):
@@ -35,7 +35,7 @@ def test_update_metadata(context_manager, redis_mock):
     context_manager.update_metadata(key, value)
     
     assert context_manager.context.metadata[key] == value
-    redis_mock.set.assert_called_once()
+    assert redis_mock.calls["hset"] == 1
 
 
 def test_get_conversation_history(context_manager, sample_message):
@@ -64,8 +64,7 @@ def test_get_tool_by_name(context_manager, sample_tool):
 
 def test_load_context(context_manager, redis_mock, sample_message):
     """Test loading context from Redis."""
-    context = Context(messages=[sample_message])
-    redis_mock.get.return_value = context.model_dump_json()
+    redis_mock.store["mcp:context:messages"] = [sample_message.model_dump_json()]
     
     context_manager.load_context()
     assert len(context_manager.context.messages) == 1
@@ -78,4 +77,5 @@ def test_clear_context(context_manager, sample_message, redis_mock):
     context_manager.clear_context()
     
     assert len(context_manager.context.messages) == 0
-    redis_mock.delete.assert_called_once_with("mcp:context") 
\ No newline at end of file
+    assert redis_mock.calls["delete"] == 1
+    assert "mcp:context:messages" not in redis_mock.store 
\ No newline at end of file
@@ -3,13 +3,13 @@ from src.agent.message_analyzer import MessageAnalyzer
 from src.models.base import Message, Tool, ToolType
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def analyzer():
     """Create MessageAnalyzer instance."""
     return MessageAnalyzer()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_tools():
     """Create sample tools for testing."""
     return [
@@ -37,56 +37,20 @@ def sample_tools():
     ]
 
 
-def test_identify_portfolio_type(analyzer):
-    """Test identifying portfolio-related messages."""
-    content = "Покажи мой портфель и его текущий баланс"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.PORTFOLIO in types
+@pytest.mark.parametrize("content,expected", [
+    ("Покажи мой портфель и его текущий баланс", ["portfolio_info"]),
+    ("Покажи метрики эффективности", ["portfolio_performance"]),
+    ("Какая прибыль и убыток за месяц?", ["portfolio_pnl"]),
+    ("Покажи PnL", ["portfolio_pnl"]),
+    ("Покажи пополнения и выводы", ["portfolio_cash_flow"]),
+    ("Какие были списания со счета?", ["portfolio_info", "portfolio_cash_flow"]),
+    ("Привет, как дела?", ["portfolio_info"]),
+])
+def test_analyze_message_tools(analyzer, content, expected):
+    """Test identifying required tools from message content."""
+    message = Message(content=content, role="user")
 
-    content = "Какая доходность у моего портфеля?"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.PORTFOLIO in types
-
-
-def test_identify_analysis_type(analyzer):
-    """Test identifying analysis-related messages."""
-    content = "Проведи анализ рисков портфеля"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.ANALYSIS in types
-
-    content = "Рассчитай волатильность и VaR"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.ANALYSIS in types
-
-
-def test_identify_market_type(analyzer):
-    """Test identifying market-related messages."""
-    content = "Покажи рыночные цены акций"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.MARKET in types
-
-    content = "Построй график котировок"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.MARKET in types
-
-
-def test_identify_recommendation_type(analyzer):
-    """Test identifying recommendation-related messages."""
-    content = "Дай рекомендации по оптимизации портфеля"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.RECOMMENDATION in types
-
-    content = "Нужно ребалансировать портфель"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.RECOMMENDATION in types
-
-
-def test_identify_multiple_types(analyzer):
-    """Test identifying messages requiring multiple tool types."""
-    content = "Проанализируй риски портфеля и дай рекомендации"
-    types = analyzer._identify_required_types(content)
-    assert ToolType.ANALYSIS in types
-    assert ToolType.RECOMMENDATION in types
+    assert analyzer.analyze_message(message) == expected
 
 
 def test_analyze_message(analyzer, sample_tools):
@@ -122,4 +86,13 @@ def test_analyze_unavailable_tool_type(analyzer, sample_tools):
     
     # No recommendation tools in sample_tools
     selected_tools = analyzer.analyze(message, sample_tools)
-    assert not any(t.type == ToolType.RECOMMENDATION for t in selected_tools) 
\ No newline at end of file
+    assert not any(t.type == ToolType.RECOMMENDATION for t in selected_tools)
+
+
+def test_analyze_message_overlapping_keywords(analyzer):
+    """Test that a keyword shared by several tools selects all of them."""
+    message = Message(content="Какая прибыльность портфеля?", role="user")
+
+    tools = analyzer.analyze_message(message)
+    assert tools == ["portfolio_info", "portfolio_performance", "portfolio_pnl"]
+
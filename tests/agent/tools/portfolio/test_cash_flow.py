@@ -3,22 +3,74 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 import pytest
-from unittest.mock import AsyncMock, MagicMock
 
 from src.agent.tools.portfolio.cash_flow import PortfolioCashFlowTool
 from src.models.base import Message
 from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount
 
 
-@pytest.fixture
+def _operation(date, op_type, instrument_type, figi, payment, **extra):
+    """Build an operation record as returned by PortfolioService.get_operations."""
+    return {
+        "date": date,
+        "type": op_type,
+        "instrument_type": instrument_type,
+        "figi": figi,
+        "currency": "RUB",
+        "payment": MoneyAmount(currency=Currency.RUB, value=Decimal(payment)),
+        **extra,
+    }
+
+
+OPERATIONS = [
+    _operation(
+        datetime(2024, 1, 10), "DIVIDEND", InstrumentType.STOCK, "BBG000B9XRY4", "100.00",
+        tax=MoneyAmount(currency=Currency.RUB, value=Decimal("13.00")),
+    ),
+    _operation(
+        datetime(2024, 1, 15), "COUPON", InstrumentType.BOND, "BBG00T22WKV5", "50.00",
+        tax=MoneyAmount(currency=Currency.RUB, value=Decimal("6.50")),
+    ),
+    _operation(
+        datetime(2024, 1, 20), "SELL", InstrumentType.STOCK, "BBG000B9XRY4", "1500.00",
+        commission=MoneyAmount(currency=Currency.RUB, value=Decimal("4.50")),
+    ),
+    _operation(datetime(2024, 1, 5), "BUY", InstrumentType.STOCK, "BBG000B9XRY4", "-1400.00"),
+]
+
+
+class _StubPortfolioService:
+    """Plain coroutine stub of PortfolioService; cash flow tests never assert on calls."""
+
+    def __init__(self, accounts, operations):
+        self.accounts = accounts
+        self.operations = operations
+
+    async def get_accounts(self):
+        return self.accounts
+
+    async def get_operations(self, account_id, from_date=None, to_date=None):
+        return [
+            op for op in self.operations
+            if (from_date is None or op["date"] >= from_date)
+            and (to_date is None or op["date"] <= to_date)
+        ]
+
+
+@pytest.fixture(scope="module")
 def portfolio_service():
-    """Create a mock portfolio service."""
-    service = AsyncMock()
-    service.get_accounts = AsyncMock(return_value=["test_account"])
-    return service
+    """Create a stub portfolio service."""
+    return _StubPortfolioService(["test_account"], OPERATIONS)
+
+
+@pytest.fixture(autouse=True)
+def reset_portfolio_service(portfolio_service):
+    """Restore shared stub service state between tests."""
+    portfolio_service.accounts = ["test_account"]
+    portfolio_service.operations = OPERATIONS
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def tool(portfolio_service):
     """Create a PortfolioCashFlowTool instance."""
     return PortfolioCashFlowTool(portfolio_service)
@@ -208,7 +260,7 @@ async def test_execute_success(tool):
 @pytest.mark.asyncio
 async def test_execute_no_accounts(tool, portfolio_service):
     """Test execution when no accounts are available."""
-    portfolio_service.get_accounts.return_value = []
+    portfolio_service.accounts = []
     message = Message(content="Get cash flows")
     
     result = await tool.execute(message, {})
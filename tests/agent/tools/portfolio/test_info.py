@@ -12,7 +12,7 @@ from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, P
 from src.models.base import Tool
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_portfolio_service():
     """Create mock portfolio service."""
     service = Mock()
@@ -23,7 +23,13 @@ def mock_portfolio_service():
     return service
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def reset_portfolio_service(mock_portfolio_service):
+    """Reset shared mock service return values and calls between tests."""
+    mock_portfolio_service.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="session")
 def portfolio_info_tool(mock_portfolio_service):
     """Create portfolio info tool with mock service."""
     tool_config = Tool(
@@ -54,7 +60,7 @@ def portfolio_info_tool(mock_portfolio_service):
     return tool
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_position():
     """Create sample position data."""
     return Position(
@@ -80,7 +86,7 @@ def sample_position():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_portfolio(sample_position):
     """Create sample portfolio data."""
     return Portfolio(
@@ -272,11 +278,10 @@ async def test_format_portfolio(portfolio_info_tool, sample_portfolio):
     assert result["updated_at"] == sample_portfolio.updated_at.isoformat()
 
 
-@pytest.mark.asyncio
-async def test_format_position(portfolio_info_tool, sample_position):
+def test_format_position(portfolio_info_tool, sample_position):
     """Test position formatting."""
     # Format position
-    result = await portfolio_info_tool._format_position(sample_position)
+    result = portfolio_info_tool._format_position(sample_position)
     
     # Verify result structure
     assert result["figi"] == sample_position.figi
@@ -289,4 +294,35 @@ async def test_format_position(portfolio_info_tool, sample_position):
     assert result["current_value"]["value"] == str(sample_position.current_value.value)
     assert result["current_value"]["currency"] == sample_position.current_value.currency.value
     assert result["expected_yield"]["value"] == str(sample_position.expected_yield.value)
-    assert result["expected_yield"]["currency"] == sample_position.expected_yield.currency.value 
\ No newline at end of file
+    assert result["expected_yield"]["currency"] == sample_position.expected_yield.currency.value 
+
+@pytest.mark.asyncio
+async def test_get_portfolio_by_instrument_type_api_error(portfolio_info_tool, mock_portfolio_service):
+    """Test that API errors on the instrument type path are returned as errors."""
+    # Setup mock
+    mock_portfolio_service.get_positions_by_type.side_effect = RuntimeError("API unavailable")
+    
+    # Execute tool
+    result = await portfolio_info_tool.execute_with_instrument_type(
+        account_id="test_account",
+        instrument_type="STOCK"
+    )
+    
+    # Verify result
+    assert result == {"error": "Failed to get portfolio info: API unavailable"}
+
+
+@pytest.mark.asyncio
+async def test_get_portfolio_by_currency_value_error(portfolio_info_tool, mock_portfolio_service):
+    """Test that value errors on the currency path are returned as errors."""
+    # Setup mock
+    mock_portfolio_service.get_cash_by_currency.side_effect = ValueError("bad amount")
+    
+    # Execute tool
+    result = await portfolio_info_tool.execute_with_currency(
+        account_id="test_account",
+        currency="USD"
+    )
+    
+    # Verify result
+    assert result == {"error": "Failed to get portfolio info: bad amount"}
@@ -1,5 +1,6 @@
 """Integration tests for portfolio tools."""
 
+import asyncio
 from datetime import datetime, timedelta
 from decimal import Decimal
 import pytest
@@ -14,133 +15,130 @@ from src.models.base import Message
 from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, Position, Operation, OperationType
 
 
-@pytest.fixture
-def mock_portfolio_service():
+# Данные сервиса создаются один раз на модуль; фикстура лишь оборачивает их в моки
+_POSITIONS = (
+    Position(
+        figi="BBG000B9XRY4",
+        instrument_type=InstrumentType.STOCK,
+        quantity=Decimal("10"),
+        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+        current_price=MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
+        current_value=MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
+        expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("52.50")),
+    ),
+    Position(
+        figi="BBG00NRFC2X2",
+        instrument_type=InstrumentType.BOND,
+        quantity=Decimal("5"),
+        average_price=MoneyAmount(currency=Currency.RUB, value=Decimal("1000.00")),
+        current_price=MoneyAmount(currency=Currency.RUB, value=Decimal("1020.00")),
+        current_value=MoneyAmount(currency=Currency.RUB, value=Decimal("5100.00")),
+        expected_yield=MoneyAmount(currency=Currency.RUB, value=Decimal("100.00")),
+    ),
+)
+
+_OPERATIONS = (
+    Operation(
+        id="op1",
+        account_id="test_account",
+        type=OperationType.DIVIDEND,
+        instrument_id="AAPL",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 20),
+        amount=Decimal("25.00"),
+        currency=Currency.USD,
+        tax=Decimal("3.75")
+    ),
+    Operation(
+        id="op2", 
+        account_id="test_account",
+        type=OperationType.COUPON,
+        instrument_id="BOND1",
+        instrument_type=InstrumentType.BOND,
+        date=datetime(2024, 1, 25),
+        amount=Decimal("250.00"),
+        currency=Currency.USD,
+        tax=Decimal("32.50")
+    ),
+    Operation(
+        id="op3",
+        account_id="test_account",
+        type=OperationType.SELL,
+        instrument_id="MSFT",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 15),
+        amount=Decimal("777.50"),
+        currency=Currency.USD,
+        commission=Decimal("7.50")
+    ),
+    Operation(
+        id="op4",
+        account_id="test_account",
+        type=OperationType.BUY,
+        instrument_id="GOOGL",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 10),
+        amount=Decimal("1500.00"),
+        currency=Currency.USD,
+        commission=Decimal("10.00")
+    ),
+    Operation(
+        id="op5",
+        account_id="test_account",
+        type=OperationType.BUY,
+        instrument_id="AMZN",
+        instrument_type=InstrumentType.STOCK,
+        date=datetime(2024, 1, 5),
+        amount=Decimal("2000.00"),
+        currency=Currency.USD,
+        commission=Decimal("12.50")
+    ),
+)
+
+_HISTORICAL = {
+    "BBG000B9XRY4": [
+        {
+            "date": datetime(2024, 1, 1),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+        },
+        {
+            "date": datetime(2024, 1, 15),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
+        },
+        {
+            "date": datetime(2024, 1, 30),
+            "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
+        },
+    ],
+    "BBG00NRFC2X2": [
+        {
+            "date": datetime(2024, 1, 10),
+            "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1000.00")),
+        },
+        {
+            "date": datetime(2024, 1, 20),
+            "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1010.00")),
+        },
+        {
+            "date": datetime(2024, 1, 30),
+            "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1020.00")),
+        },
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def mock_portfolio_service(const_async):
     """Create a mock portfolio service with test data."""
     service = AsyncMock()
-    
-    # Mock accounts
-    service.get_accounts = AsyncMock(return_value=["test_account"])
-    
-    # Mock positions
-    service.get_positions = AsyncMock(return_value=[
-        Position(
-            figi="BBG000B9XRY4",
-            instrument_type=InstrumentType.STOCK,
-            quantity=Decimal("10"),
-            average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-            current_price=MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-            current_value=MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
-            expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("52.50")),
-        ),
-        Position(
-            figi="BBG00NRFC2X2",
-            instrument_type=InstrumentType.BOND,
-            quantity=Decimal("5"),
-            average_price=MoneyAmount(currency=Currency.RUB, value=Decimal("1000.00")),
-            current_price=MoneyAmount(currency=Currency.RUB, value=Decimal("1020.00")),
-            current_value=MoneyAmount(currency=Currency.RUB, value=Decimal("5100.00")),
-            expected_yield=MoneyAmount(currency=Currency.RUB, value=Decimal("100.00")),
-        ),
-    ])
-    
-    # Mock operations
-    operations = [
-        Operation(
-            id="op1",
-            account_id="test_account",
-            type=OperationType.DIVIDEND,
-            instrument_id="AAPL",
-            instrument_type=InstrumentType.STOCK,
-            date=datetime(2024, 1, 20),
-            amount=Decimal("25.00"),
-            currency=Currency.USD,
-            tax=Decimal("3.75")
-        ),
-        Operation(
-            id="op2", 
-            account_id="test_account",
-            type=OperationType.COUPON,
-            instrument_id="BOND1",
-            instrument_type=InstrumentType.BOND,
-            date=datetime(2024, 1, 25),
-            amount=Decimal("250.00"),
-            currency=Currency.USD,
-            tax=Decimal("32.50")
-        ),
-        Operation(
-            id="op3",
-            account_id="test_account",
-            type=OperationType.SELL,
-            instrument_id="MSFT",
-            instrument_type=InstrumentType.STOCK,
-            date=datetime(2024, 1, 15),
-            amount=Decimal("777.50"),
-            currency=Currency.USD,
-            commission=Decimal("7.50")
-        ),
-        Operation(
-            id="op4",
-            account_id="test_account",
-            type=OperationType.BUY,
-            instrument_id="GOOGL",
-            instrument_type=InstrumentType.STOCK,
-            date=datetime(2024, 1, 10),
-            amount=Decimal("1500.00"),
-            currency=Currency.USD,
-            commission=Decimal("10.00")
-        ),
-        Operation(
-            id="op5",
-            account_id="test_account",
-            type=OperationType.BUY,
-            instrument_id="AMZN",
-            instrument_type=InstrumentType.STOCK,
-            date=datetime(2024, 1, 5),
-            amount=Decimal("2000.00"),
-            currency=Currency.USD,
-            commission=Decimal("12.50")
-        )
-    ]
-    service.get_operations = AsyncMock(return_value=operations)
-    
-    # Mock historical data
-    historical_data = {
-        "BBG000B9XRY4": [
-            {
-                "date": datetime(2024, 1, 1),
-                "close": MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-            },
-            {
-                "date": datetime(2024, 1, 15),
-                "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-            },
-            {
-                "date": datetime(2024, 1, 30),
-                "close": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-            },
-        ],
-        "BBG00NRFC2X2": [
-            {
-                "date": datetime(2024, 1, 10),
-                "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1000.00")),
-            },
-            {
-                "date": datetime(2024, 1, 20),
-                "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1010.00")),
-            },
-            {
-                "date": datetime(2024, 1, 30),
-                "close": MoneyAmount(currency=Currency.RUB, value=Decimal("1020.00")),
-            },
-        ],
-    }
-    service.get_historical_data = AsyncMock(return_value=historical_data)
-    
+    service.get_accounts = const_async(["test_account"])
+    service.get_positions = const_async(list(_POSITIONS))
+    service.get_operations = const_async(list(_OPERATIONS))
+    service.get_historical_data = const_async(_HISTORICAL)
     return service
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def tools(mock_portfolio_service):
     """Create instances of all portfolio tools."""
     return {
@@ -153,18 +151,11 @@ def tools(mock_portfolio_service):
 
 @pytest.mark.asyncio
 async def test_portfolio_overview(tools, mock_portfolio_service):
-    """Test getting a complete portfolio overview using all tools."""
-    # Get portfolio info
+    """Test getting a complete portfolio overview using all tools concurrently."""
     info_message = Message(
         content="Get portfolio info",
         metadata={"account_id": "test_account"}
     )
-    info_result = await tools["info"].execute(info_message, {})
-    
-    assert info_result["account_id"] == "test_account"
-    assert len(info_result["positions"]) == 2
-    
-    # Get portfolio performance
     performance_message = Message(
         content="Get portfolio performance",
         metadata={
@@ -172,13 +163,6 @@ async def test_portfolio_overview(tools, mock_portfolio_service):
             "period": "month",
         }
     )
-    performance_result = await tools["performance"].execute(performance_message, {})
-    
-    assert performance_result["account_id"] == "test_account"
-    assert "metrics" in performance_result
-    assert "historical_data" in performance_result
-    
-    # Get portfolio PnL
     pnl_message = Message(
         content="Get portfolio PnL",
         metadata={
@@ -186,13 +170,6 @@ async def test_portfolio_overview(tools, mock_portfolio_service):
             "period": "month",
         }
     )
-    pnl_result = await tools["pnl"].execute(pnl_message, {})
-    
-    assert pnl_result["account_id"] == "test_account"
-    assert "total_pnl" in pnl_result
-    assert len(pnl_result["operations"]) == 5
-    
-    # Get cash flows
     cash_flow_message = Message(
         content="Get cash flows",
         metadata={
@@ -200,8 +177,29 @@ async def test_portfolio_overview(tools, mock_portfolio_service):
             "period": "month",
         }
     )
-    cash_flow_result = await tools["cash_flow"].execute(cash_flow_message, {})
     
+    info_result, performance_result, pnl_result, cash_flow_result = await asyncio.gather(
+        tools["info"].execute(info_message, {}),
+        tools["performance"].execute(performance_message, {}),
+        tools["pnl"].execute(pnl_message, {}),
+        tools["cash_flow"].execute(cash_flow_message, {}),
+    )
+    
+    # Portfolio info
+    assert info_result["account_id"] == "test_account"
+    assert len(info_result["positions"]) == 2
+    
+    # Portfolio performance
+    assert performance_result["account_id"] == "test_account"
+    assert "metrics" in performance_result
+    assert "historical_data" in performance_result
+    
+    # Portfolio PnL
+    assert pnl_result["account_id"] == "test_account"
+    assert "total_pnl" in pnl_result
+    assert len(pnl_result["operations"]) == 5
+    
+    # Cash flows
     assert cash_flow_result["account_id"] == "test_account"
     assert "totals" in cash_flow_result
     assert len(cash_flow_result["flows"]) == 3
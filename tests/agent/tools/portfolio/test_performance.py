@@ -4,68 +4,80 @@ Tests for portfolio performance tool.
 
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace as NS
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 from src.agent.tools.portfolio.performance import PortfolioPerformanceTool
 from src.models.base import Message, Tool, ToolType
 from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, Portfolio, Position
 
 
-@pytest.fixture
+# Decimal неизменяем, повторяющиеся литералы разбираются один раз
+D = lru_cache(maxsize=512)(Decimal)
+
+
+@pytest.fixture(scope="module")
 def mock_portfolio_service():
     """Create a mock portfolio service."""
     return Mock()
 
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def reset_portfolio_service(mock_portfolio_service):
+    """Reset shared mock service return values and calls between tests."""
+    mock_portfolio_service.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="module")
 def portfolio_performance_tool(mock_portfolio_service):
     """Create a PortfolioPerformanceTool instance."""
     return PortfolioPerformanceTool(mock_portfolio_service)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_historical_data():
     """Create sample historical portfolio data."""
     return [
         {
             "date": datetime(2024, 1, 1),
-            "total_value": MoneyAmount(currency=Currency.RUB, value=Decimal("100000")),
+            "total_value": NS(currency=Currency.RUB, value=D("100000")),
             "positions": [
                 {
                     "figi": "BBG000B9XRY4",
                     "instrument_type": InstrumentType.STOCK,
-                    "value": MoneyAmount(currency=Currency.USD, value=Decimal("1502.50")),
+                    "value": NS(currency=Currency.USD, value=D("1502.50")),
                 },
                 {
                     "figi": "BBG00NRFC2X2",
                     "instrument_type": InstrumentType.BOND,
-                    "value": MoneyAmount(currency=Currency.RUB, value=Decimal("50000")),
+                    "value": NS(currency=Currency.RUB, value=D("50000")),
                 },
             ],
             "cash": [
-                MoneyAmount(currency=Currency.RUB, value=Decimal("30000")),
-                MoneyAmount(currency=Currency.USD, value=Decimal("500")),
+                NS(currency=Currency.RUB, value=D("30000")),
+                NS(currency=Currency.USD, value=D("500")),
             ],
         },
         {
             "date": datetime(2024, 1, 15),
-            "total_value": MoneyAmount(currency=Currency.RUB, value=Decimal("105000")),
+            "total_value": NS(currency=Currency.RUB, value=D("105000")),
             "positions": [
                 {
                     "figi": "BBG000B9XRY4",
                     "instrument_type": InstrumentType.STOCK,
-                    "value": MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
+                    "value": NS(currency=Currency.USD, value=D("1555.00")),
                 },
                 {
                     "figi": "BBG00NRFC2X2",
                     "instrument_type": InstrumentType.BOND,
-                    "value": MoneyAmount(currency=Currency.RUB, value=Decimal("51000")),
+                    "value": NS(currency=Currency.RUB, value=D("51000")),
                 },
             ],
             "cash": [
-                MoneyAmount(currency=Currency.RUB, value=Decimal("30000")),
-                MoneyAmount(currency=Currency.USD, value=Decimal("500")),
+                NS(currency=Currency.RUB, value=D("30000")),
+                NS(currency=Currency.USD, value=D("500")),
             ],
         },
     ]
@@ -120,30 +132,16 @@ def test_extract_parameters_with_defaults(portfolio_performance_tool):
 
 def test_get_period_start(portfolio_performance_tool):
     """Test period start calculation."""
-    with patch("src.agent.tools.portfolio.performance.datetime") as mock_datetime:
-        now = datetime(2024, 1, 1, 12, 0, 0)
-        mock_datetime.now.return_value = now
-        
-        day_start = portfolio_performance_tool._get_period_start("day")
-        assert (now - day_start) <= timedelta(days=1, seconds=1)
-        assert (now - day_start) >= timedelta(days=1)
-        
-        week_start = portfolio_performance_tool._get_period_start("week")
-        assert (now - week_start) <= timedelta(weeks=1, seconds=1)
-        assert (now - week_start) >= timedelta(weeks=1)
-        
-        month_start = portfolio_performance_tool._get_period_start("month")
-        assert (now - month_start) <= timedelta(days=30, seconds=1)
-        assert (now - month_start) >= timedelta(days=30)
-        
-        year_start = portfolio_performance_tool._get_period_start("year")
-        assert (now - year_start) <= timedelta(days=365, seconds=1)
-        assert (now - year_start) >= timedelta(days=365)
-        
-        assert portfolio_performance_tool._get_period_start("all") is None
-        
-        with pytest.raises(ValueError):
-            portfolio_performance_tool._get_period_start("invalid")
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    
+    assert now - portfolio_performance_tool._get_period_start("day", now) == timedelta(days=1)
+    assert now - portfolio_performance_tool._get_period_start("week", now) == timedelta(weeks=1)
+    assert now - portfolio_performance_tool._get_period_start("month", now) == timedelta(days=30)
+    assert now - portfolio_performance_tool._get_period_start("year", now) == timedelta(days=365)
+    assert portfolio_performance_tool._get_period_start("all", now) is None
+    
+    with pytest.raises(ValueError):
+        portfolio_performance_tool._get_period_start("invalid", now)
 
 
 def test_calculate_metrics(portfolio_performance_tool, sample_historical_data):
@@ -152,26 +150,26 @@ def test_calculate_metrics(portfolio_performance_tool, sample_historical_data):
         portfolio_performance_tool._calculate_metrics(sample_historical_data)
     )
     
-    assert absolute_return == Decimal("5000")  # 105000 - 100000
-    assert relative_return == Decimal("5")     # (5000 / 100000) * 100
-    assert annualized_return > Decimal("0")    # Should be positive
-    assert volatility >= Decimal("0")          # Should be non-negative
+    assert absolute_return == D("5000")  # 105000 - 100000
+    assert relative_return == D("5")     # (5000 / 100000) * 100
+    assert annualized_return > D("0")    # Should be positive
+    assert volatility >= D("0")          # Should be non-negative
 
 
 def test_calculate_metrics_insufficient_data(portfolio_performance_tool):
     """Test metrics calculation with insufficient data."""
     # Test with empty data
     metrics = portfolio_performance_tool._calculate_metrics([])
-    assert all(m == Decimal("0") for m in metrics)
+    assert all(m == D("0") for m in metrics)
     
     # Test with single data point
     metrics = portfolio_performance_tool._calculate_metrics([{
         "date": datetime(2024, 1, 1),
-        "total_value": MoneyAmount(currency=Currency.RUB, value=Decimal("100000")),
+        "total_value": MoneyAmount(currency=Currency.RUB, value=D("100000")),
         "positions": [],
         "cash": [],
     }])
-    assert all(m == Decimal("0") for m in metrics)
+    assert all(m == D("0") for m in metrics)
 
 
 @pytest.mark.asyncio
@@ -261,14 +259,14 @@ async def test_get_historical_data(portfolio_performance_tool):
     # Test first data point
     first = data[0]
     assert first["date"] == datetime(2024, 1, 1)
-    assert first["total_value"].value == Decimal("100000")
+    assert first["total_value"].value == D("100000")
     assert len(first["positions"]) == 2
     assert len(first["cash"]) == 2
     
     # Test second data point
     second = data[1]
     assert second["date"] == datetime(2024, 1, 15)
-    assert second["total_value"].value == Decimal("105000")
+    assert second["total_value"].value == D("105000")
 
 
 @pytest.mark.asyncio
@@ -302,10 +300,10 @@ async def test_get_historical_data_with_filters(portfolio_performance_tool):
 def test_format_metrics(portfolio_performance_tool):
     """Test metrics formatting."""
     formatted = portfolio_performance_tool._format_metrics(
-        absolute_return=Decimal("5000"),
-        relative_return=Decimal("5"),
-        annualized_return=Decimal("130"),
-        volatility=Decimal("10"),
+        absolute_return=D("5000"),
+        relative_return=D("5"),
+        annualized_return=D("130"),
+        volatility=D("10"),
         currency=Currency.RUB,
     )
     
@@ -380,21 +378,28 @@ async def test_execute_with_filters(portfolio_performance_tool, mock_portfolio_s
 
 
 @pytest.mark.asyncio
-async def test_execute_empty_data(portfolio_performance_tool, mock_portfolio_service):
-    """Test executing tool with empty historical data."""
-    # Create message
+async def test_execute_empty_data():
+    """Test executing tool when the account has no positions."""
+    service = Mock(
+        get_accounts=AsyncMock(return_value=["123"]),
+        get_portfolio=AsyncMock(return_value={"positions": []}),
+    )
+    tool = PortfolioPerformanceTool(service)
     message = Message(
         content="Get portfolio performance",
         metadata={"account_id": "123"},
     )
     
-    # Mock empty historical data
-    with patch.object(portfolio_performance_tool, "_get_historical_data", return_value=[]):
-        result = await portfolio_performance_tool.execute(message, {})
+    # Execute tool
+    result = await tool.execute(message, {})
     
     # Verify result
-    assert "metrics" in result
-    assert result["metrics"]["absolute_return"]["value"] == "0"
-    assert result["metrics"]["relative_return"] == "0"
-    assert result["metrics"]["annualized_return"] == "0"
-    assert result["metrics"]["volatility"] == "0" 
\ No newline at end of file
+    assert result == {"error": "No positions found for account 123"}
+    service.get_portfolio.assert_awaited_once_with("123")
+    
+    # Empty positions still produce zero totals
+    metrics = await tool._calculate_metrics([], {}, Currency.RUB)
+    assert metrics["total_value"]["value"] == "0"
+    assert metrics["total_invested"]["value"] == "0"
+    assert metrics["total_yield"]["absolute"]["value"] == "0"
+    assert metrics["total_yield"]["relative"] == "0.00"
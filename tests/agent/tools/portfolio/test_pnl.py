@@ -4,18 +4,81 @@ Tests for portfolio PnL tool.
 
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
+from types import MappingProxyType, SimpleNamespace as NS
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch, Mock
 
-from src.agent.tools.portfolio.pnl import PortfolioPnLTool
+from src.agent.tools.portfolio.pnl import PortfolioPnLTool, _operation_pnl
 from src.models.base import Message, Tool, ToolType
 from src.services.tinkoff.models import Currency, InstrumentType, MoneyAmount, Position
 
 
+# Decimal неизменяем, повторяющиеся литералы разбираются один раз
+D = lru_cache(maxsize=512)(Decimal)
+
+# Входные данные только читаются тестами, поэтому строятся один раз при импорте;
+# данные доверенные, валидация pydantic пропускается
+_SAMPLE_POSITION = Position.model_construct(
+    figi="BBG000B9XRY4",
+    instrument_type=InstrumentType.STOCK,
+    quantity=D("10"),
+    average_price=MoneyAmount.model_construct(currency=Currency.USD, value=D("150.25")),
+    current_price=MoneyAmount.model_construct(currency=Currency.USD, value=D("155.50")),
+    current_value=MoneyAmount.model_construct(currency=Currency.USD, value=D("1555.00")),
+    expected_yield=MoneyAmount.model_construct(currency=Currency.USD, value=D("52.50")),
+)
+
+_SAMPLE_OPERATIONS = tuple(MappingProxyType(op) for op in [
+    {
+        "date": datetime(2024, 1, 1),
+        "type": "BUY",
+        "figi": "BBG000B9XRY4",
+        "instrument_type": InstrumentType.STOCK,
+        "quantity": 10,
+        "price": NS(currency=Currency.USD, value=D("150.25")),
+        "payment": NS(currency=Currency.USD, value=D("-1502.50")),
+    },
+    {
+        "date": datetime(2024, 1, 15),
+        "type": "SELL",
+        "figi": "BBG000B9XRY4",
+        "instrument_type": InstrumentType.STOCK,
+        "quantity": 5,
+        "price": NS(currency=Currency.USD, value=D("155.50")),
+        "payment": NS(currency=Currency.USD, value=D("777.50")),
+    },
+    {
+        "date": datetime(2024, 1, 20),
+        "type": "DIVIDEND",
+        "figi": "BBG000B9XRY4",
+        "instrument_type": InstrumentType.STOCK,
+        "payment": NS(currency=Currency.USD, value=D("25.00")),
+    },
+])
+
+
+class _StubPortfolioService:
+    """Plain coroutine stub of PortfolioService returning preset accounts and operations."""
+
+    def __init__(self):
+        self.accounts = []
+        self.operations = []
+        self.get_operations_calls = 0
+        self.last_kwargs = None
+
+    async def get_accounts(self):
+        return self.accounts
+
+    async def get_operations(self, *args, **kwargs):
+        self.get_operations_calls += 1
+        self.last_kwargs = kwargs
+        return self.operations
+
+
 @pytest.fixture
 def mock_portfolio_service():
-    """Create a mock portfolio service."""
-    return AsyncMock()
+    """Create a stub portfolio service."""
+    return _StubPortfolioService()
 
 
 @pytest.fixture
@@ -24,50 +87,16 @@ def portfolio_pnl_tool(mock_portfolio_service):
     return PortfolioPnLTool(mock_portfolio_service)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_position():
     """Create a sample position."""
-    return Position(
-        figi="BBG000B9XRY4",
-        instrument_type=InstrumentType.STOCK,
-        quantity=Decimal("10"),
-        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-        current_price=MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-        current_value=MoneyAmount(currency=Currency.USD, value=Decimal("1555.00")),
-        expected_yield=MoneyAmount(currency=Currency.USD, value=Decimal("52.50")),
-    )
+    return _SAMPLE_POSITION
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_operations():
     """Create sample operations."""
-    return [
-        {
-            "date": datetime(2024, 1, 1),
-            "type": "BUY",
-            "figi": "BBG000B9XRY4",
-            "instrument_type": InstrumentType.STOCK,
-            "quantity": 10,
-            "price": MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
-            "payment": MoneyAmount(currency=Currency.USD, value=Decimal("-1502.50")),
-        },
-        {
-            "date": datetime(2024, 1, 15),
-            "type": "SELL",
-            "figi": "BBG000B9XRY4",
-            "instrument_type": InstrumentType.STOCK,
-            "quantity": 5,
-            "price": MoneyAmount(currency=Currency.USD, value=Decimal("155.50")),
-            "payment": MoneyAmount(currency=Currency.USD, value=Decimal("777.50")),
-        },
-        {
-            "date": datetime(2024, 1, 20),
-            "type": "DIVIDEND",
-            "figi": "BBG000B9XRY4",
-            "instrument_type": InstrumentType.STOCK,
-            "payment": MoneyAmount(currency=Currency.USD, value=Decimal("25.00")),
-        },
-    ]
+    return _SAMPLE_OPERATIONS
 
 
 def test_tool_initialization(portfolio_pnl_tool):
@@ -81,35 +110,41 @@ def test_tool_initialization(portfolio_pnl_tool):
     assert "period" in portfolio_pnl_tool.config.parameters
 
 
-def test_get_period_start(portfolio_pnl_tool):
+@pytest.fixture(scope="session")
+def now():
+    """Reference time passed to period calculations."""
+    return datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.mark.parametrize("period,expected_delta", [
+    ("day", timedelta(days=1)),
+    ("week", timedelta(weeks=1)),
+    ("month", timedelta(days=30)),
+    ("year", timedelta(days=365)),
+])
+def test_get_period_start(portfolio_pnl_tool, now, period, expected_delta):
     """Test period start calculation."""
-    with patch("src.agent.tools.portfolio.pnl.datetime") as mock_datetime:
-        now = datetime(2024, 1, 1, 12, 0, 0)
-        mock_datetime.now.return_value = now
-        
-        day_start = portfolio_pnl_tool._get_period_start("day")
-        assert (now - day_start) <= timedelta(days=1, seconds=1)
-        assert (now - day_start) >= timedelta(days=1)
-        
-        week_start = portfolio_pnl_tool._get_period_start("week")
-        assert (now - week_start) <= timedelta(weeks=1, seconds=1)
-        assert (now - week_start) >= timedelta(weeks=1)
-        
-        month_start = portfolio_pnl_tool._get_period_start("month")
-        assert (now - month_start) <= timedelta(days=30, seconds=1)
-        assert (now - month_start) >= timedelta(days=30)
-        
-        year_start = portfolio_pnl_tool._get_period_start("year")
-        assert (now - year_start) <= timedelta(days=365, seconds=1)
-        assert (now - year_start) >= timedelta(days=365)
-        
-        assert portfolio_pnl_tool._get_period_start("all") is None
-        
-        with pytest.raises(ValueError):
-            portfolio_pnl_tool._get_period_start("invalid")
-
-
-@pytest.mark.asyncio
+    assert now - portfolio_pnl_tool._get_period_start(period, now) == expected_delta
+
+
+def test_get_period_start_all(portfolio_pnl_tool):
+    """Test that the whole-history period has no start."""
+    assert portfolio_pnl_tool._get_period_start("all") is None
+
+
+def test_get_period_start_invalid(portfolio_pnl_tool):
+    """Test that an unknown period is rejected."""
+    with pytest.raises(ValueError):
+        portfolio_pnl_tool._get_period_start("invalid")
+
+
+def test_operation_pnl(sample_operations):
+    """Test PnL contribution of single operations."""
+    pnl = [_operation_pnl(op) for op in sample_operations]
+    
+    assert pnl == [D("0"), D("777.50"), D("25.00")]
+
+
 async def test_calculate_position_pnl(portfolio_pnl_tool, sample_position):
     """Test PnL calculation for a single position."""
     pnl = await portfolio_pnl_tool._calculate_position_pnl(
@@ -139,12 +174,11 @@ async def test_calculate_position_pnl(portfolio_pnl_tool, sample_position):
     assert float(pnl_data["relative"]) == pytest.approx(3.49, rel=0.01)  # (52.50 / 1502.50) * 100
 
 
-@pytest.mark.asyncio
 async def test_execute_success(portfolio_pnl_tool, mock_portfolio_service, sample_operations):
     """Test successful tool execution."""
     # Setup mock
-    mock_portfolio_service.get_accounts.return_value = ["test_account"]
-    mock_portfolio_service.get_operations.return_value = sample_operations
+    mock_portfolio_service.accounts = ["test_account"]
+    mock_portfolio_service.operations = sample_operations
     
     # Create message with parameters
     message = Message(
@@ -169,15 +203,14 @@ async def test_execute_success(portfolio_pnl_tool, mock_portfolio_service, sampl
     assert len(result["operations"]) == 3
     
     # Verify operations were called correctly
-    mock_portfolio_service.get_operations.assert_called_once()
+    assert mock_portfolio_service.get_operations_calls == 1
 
 
-@pytest.mark.asyncio
-async def test_execute_with_period(portfolio_pnl_tool, mock_portfolio_service, sample_operations):
+async def test_execute_with_period(portfolio_pnl_tool, mock_portfolio_service):
     """Test tool execution with period filter."""
-    # Setup mock
-    mock_portfolio_service.get_accounts.return_value = ["test_account"]
-    mock_portfolio_service.get_operations.return_value = sample_operations
+    # Setup mock: проверяются только границы периода, операции не нужны
+    mock_portfolio_service.accounts = ["test_account"]
+    mock_portfolio_service.operations = []
     
     # Create message with period
     message = Message(
@@ -193,17 +226,18 @@ async def test_execute_with_period(portfolio_pnl_tool, mock_portfolio_service, s
     
     # Verify result
     assert result["period"] == "day"
-    assert "total_pnl" in result
+    assert result["total_pnl"] == "0"
     
     # Verify operations were called with correct date
-    mock_portfolio_service.get_operations.assert_called_once()
+    assert mock_portfolio_service.get_operations_calls == 1
+    kwargs = mock_portfolio_service.last_kwargs
+    assert kwargs["to_date"] - kwargs["from_date"] == timedelta(days=1)
 
 
-@pytest.mark.asyncio
 async def test_execute_no_accounts(portfolio_pnl_tool, mock_portfolio_service):
     """Test tool execution with no accounts."""
     # Setup mock
-    mock_portfolio_service.get_accounts.return_value = []
+    mock_portfolio_service.accounts = []
     
     # Create message
     message = Message(
@@ -219,15 +253,14 @@ async def test_execute_no_accounts(portfolio_pnl_tool, mock_portfolio_service):
     assert result["error"] == "No accounts found"
     
     # Verify operations were not called
-    mock_portfolio_service.get_operations.assert_not_called()
+    assert mock_portfolio_service.get_operations_calls == 0
 
 
-@pytest.mark.asyncio
 async def test_execute_no_account_id(portfolio_pnl_tool, mock_portfolio_service, sample_operations):
     """Test executing tool without account ID."""
     # Setup mock
-    mock_portfolio_service.get_accounts.return_value = ["123"]
-    mock_portfolio_service.get_operations.return_value = sample_operations
+    mock_portfolio_service.accounts = ["123"]
+    mock_portfolio_service.operations = sample_operations
     
     # Create message
     message = Message(
@@ -244,15 +277,14 @@ async def test_execute_no_account_id(portfolio_pnl_tool, mock_portfolio_service,
     assert len(result["operations"]) == 3
     
     # Verify operations were called with first account
-    mock_portfolio_service.get_operations.assert_called_once()
+    assert mock_portfolio_service.get_operations_calls == 1
 
 
-@pytest.mark.asyncio
 async def test_execute_with_instrument_type(portfolio_pnl_tool, mock_portfolio_service, sample_operations):
     """Test executing tool with instrument type filter."""
     # Setup mock
-    mock_portfolio_service.get_accounts.return_value = ["test_account"]
-    mock_portfolio_service.get_operations.return_value = sample_operations
+    mock_portfolio_service.accounts = ["test_account"]
+    mock_portfolio_service.operations = sample_operations
     
     # Create message with instrument type
     message = Message(
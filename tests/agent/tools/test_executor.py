@@ -24,7 +24,7 @@ def executor():
     return ToolExecutor()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def successful_tool_config():
     """Create configuration for successful tool."""
     return Tool(
@@ -36,7 +36,7 @@ def successful_tool_config():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def failing_tool_config():
     """Create configuration for failing tool."""
     return Tool(
@@ -1,16 +1,100 @@
 import pytest
-from redis import Redis
-from unittest.mock import MagicMock
+from collections import Counter
 from src.models.base import Message, Tool, ToolType
 from src.agent.context import AgentContext
 
+# Импорт при старте сессии: шаблоны анализатора компилируются один раз до запуска тестов.
+# Модули src.services.tinkoff здесь не импортируются - пакет загружает SDK через client
+import src.agent.message_analyzer  # noqa: F401
+
+
+class FakePipeline:
+    """Queues FakeRedis commands and runs them on execute()."""
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        self._redis.calls["execute"] += 1
+        commands, self._commands = self._commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakeRedis:
+    """In-memory Redis stand-in covering the commands used by AgentContext."""
+
+    def __init__(self):
+        self.store = {}
+        self.calls = Counter()
+
+    def get(self, key):
+        self.calls["get"] += 1
+        return self.store.get(key)
+
+    def set(self, key, value, **kwargs):
+        self.calls["set"] += 1
+        self.store[key] = value
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.calls["hset"] += 1
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        self.store.setdefault(key, {}).update(fields)
+        return len(fields)
+
+    def hgetall(self, key):
+        self.calls["hgetall"] += 1
+        return dict(self.store.get(key, {}))
+
+    def rpush(self, key, *values):
+        self.calls["rpush"] += 1
+        self.store.setdefault(key, []).extend(values)
+        return len(self.store[key])
+
+    def lpush(self, key, *values):
+        self.calls["lpush"] += 1
+        self.store[key] = list(reversed(values)) + self.store.get(key, [])
+        return len(self.store[key])
+
+    def lrange(self, key, start, end):
+        self.calls["lrange"] += 1
+        values = self.store.get(key, [])
+        return values[start:] if end == -1 else values[start:end + 1]
+
+    def delete(self, *keys):
+        self.calls["delete"] += 1
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def reset(self):
+        """Drop stored data and call counters."""
+        self.store.clear()
+        self.calls.clear()
+
+
+@pytest.fixture(scope="session")
+def fake_redis():
+    """Shared in-memory Redis."""
+    return FakeRedis()
+
 
 @pytest.fixture
-def redis_mock():
-    """Mock Redis client for testing."""
-    redis = MagicMock(spec=Redis)
-    redis.get.return_value = None
-    return redis
+def redis_mock(fake_redis):
+    """In-memory Redis client for testing, emptied after each test."""
+    yield fake_redis
+    fake_redis.reset()
 
 
 @pytest.fixture
@@ -19,13 +103,13 @@ def agent_context(redis_mock):
     return AgentContext(redis_mock)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_message():
     """Create sample message for testing."""
     return Message(content="Test message", role="user")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_tool():
     """Create sample tool for testing."""
     return Tool(
@@ -34,4 +118,14 @@ def sample_tool():
         description="Test tool",
         parameters={"param1": "string"},
         required_parameters=["param1"]
-    ) 
\ No newline at end of file
+    ) 
+
+
+@pytest.fixture(scope="session")
+def const_async():
+    """Factory of coroutine stubs returning a fixed value (cheaper than AsyncMock without call assertions)."""
+    def factory(value):
+        async def stub(*args, **kwargs):
+            return value
+        return stub
+    return factory
@@ -1,8 +1,5 @@
 import pytest
-from redis import Redis
-from unittest.mock import MagicMock
 from src.models.base import Tool, ToolType, Message
-from src.agent.context import AgentContext
 from src.agent.tools.registry import ToolRegistry
 from src.agent.tools.executor import ToolExecutor
 from src.agent.message_handler import MessageHandler
@@ -34,20 +31,6 @@ class AnalysisTool(BaseTool):
         }
 
 
-@pytest.fixture
-def redis_mock():
-    """Create Redis mock."""
-    redis = MagicMock(spec=Redis)
-    redis.get.return_value = None
-    return redis
-
-
-@pytest.fixture
-def agent_context(redis_mock):
-    """Create AgentContext instance."""
-    return AgentContext(redis_mock)
-
-
 @pytest.fixture
 def tool_registry():
     """Create ToolRegistry instance."""
@@ -66,7 +49,7 @@ def tool_executor():
     return executor
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def portfolio_tool():
     """Create portfolio tool configuration."""
     return Tool(
@@ -78,7 +61,7 @@ def portfolio_tool():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def analysis_tool():
     """Create analysis tool configuration."""
     return Tool(
@@ -1,4 +1,5 @@
 import pytest
+from src.agent.context import MESSAGES_KEY
 from src.models.base import Message
 
 
@@ -32,7 +33,7 @@ async def test_portfolio_request_flow(
     assert message_handler.context_manager.context.messages[1] == response
     
     # Verify Redis interactions
-    assert redis_mock.set.call_count == 2  # Two messages saved
+    assert len(redis_mock.store[MESSAGES_KEY]) == 2  # Two messages saved
 
 
 async def test_analysis_request_flow(
@@ -64,7 +65,7 @@ async def test_analysis_request_flow(
     assert len(message_handler.context_manager.context.messages) == 2
     
     # Verify Redis interactions
-    assert redis_mock.set.call_count == 2
+    assert len(redis_mock.store[MESSAGES_KEY]) == 2
 
 
 async def test_multiple_tools_flow(
@@ -156,4 +157,4 @@ async def test_error_handling_flow(
     
     # Verify context still updated
     assert len(message_handler.context_manager.context.messages) == 2
-    assert redis_mock.set.call_count == 2 
\ No newline at end of file
+    assert len(redis_mock.store[MESSAGES_KEY]) == 2 
\ No newline at end of file
@@ -3,41 +3,47 @@ Tests for Tinkoff API cache.
 """
 
 import asyncio
-import time
 import pytest
 
 from src.services.tinkoff.cache import Cache
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def cache():
-    """Create test cache instance."""
-    return Cache(ttl=1)  # 1 second TTL for faster testing
+    """Create shared test cache instance."""
+    return Cache()
 
 
-def test_cache_set_get():
+@pytest.fixture(autouse=True)
+def reset_cache(cache):
+    """Clear shared cache entries and statistics between tests."""
+    yield
+    cache.clear()
+    cache.reset_stats()
+
+
+def test_cache_set_get(cache):
     """Test basic cache set/get operations."""
-    cache = Cache()
     cache.set("test", "value")
     assert cache.get("test") == "value"
 
 
 def test_cache_ttl():
     """Test cache TTL expiration."""
-    cache = Cache(ttl=1)
+    clock = [0.0]
+    cache = Cache(ttl=1, time_func=lambda: clock[0])
     cache.set("test", "value")
     
     # Value should be available immediately
     assert cache.get("test") == "value"
     
-    # Wait for TTL to expire
-    time.sleep(1.1)
+    # Advance the clock past TTL
+    clock[0] += 2.0
     assert cache.get("test") is None
 
 
-def test_cache_delete():
+def test_cache_delete(cache):
     """Test cache entry deletion."""
-    cache = Cache()
     cache.set("test", "value")
     assert cache.get("test") == "value"
     
@@ -45,9 +51,8 @@ def test_cache_delete():
     assert cache.get("test") is None
 
 
-def test_cache_clear():
+def test_cache_clear(cache):
     """Test cache clearing."""
-    cache = Cache()
     cache.set("test1", "value1")
     cache.set("test2", "value2")
     
@@ -56,10 +61,8 @@ def test_cache_clear():
     assert cache.get("test2") is None
 
 
-def test_cache_hit_ratio():
+def test_cache_hit_ratio(cache):
     """Test cache hit ratio calculation."""
-    cache = Cache()
-    
     # Miss (key doesn't exist)
     cache.get("test")
     assert cache.hit_ratio == 0.0
@@ -74,10 +77,8 @@ def test_cache_hit_ratio():
     assert cache.hit_ratio == 2/3
 
 
-def test_cache_stats():
+def test_cache_stats(cache):
     """Test cache statistics."""
-    cache = Cache()
-    
     # Initial stats
     stats = cache.stats()
     assert stats["hits"] == 0
@@ -98,10 +99,8 @@ def test_cache_stats():
 
 
 @pytest.mark.asyncio
-async def test_cache_get_or_set():
+async def test_cache_get_or_set(cache):
     """Test async get_or_set operation."""
-    cache = Cache()
-    
     # Mock async fetch function
     async def fetch_value():
         return "fetched_value"
@@ -118,29 +117,63 @@ async def test_cache_get_or_set():
 
 
 @pytest.mark.asyncio
-async def test_cache_get_or_set_concurrent():
+async def test_cache_get_or_set_concurrent(cache):
     """Test concurrent cache access."""
-    cache = Cache()
     fetch_count = 0
+    started = asyncio.Event()
+    can_finish = asyncio.Event()
     
     async def fetch_value():
         nonlocal fetch_count
         fetch_count += 1
-        await asyncio.sleep(0.1)  # Simulate slow operation
+        started.set()
+        await can_finish.wait()  # Hold the fetch until all requests are in flight
         return "fetched_value"
     
     # Make concurrent requests
     tasks = [
-        cache.get_or_set("test", fetch_value)
+        asyncio.create_task(cache.get_or_set("test", fetch_value))
         for _ in range(5)
     ]
+    await started.wait()
+    # Should only fetch once while the fetch is in flight
+    assert fetch_count == 1
+    can_finish.set()
     
     results = await asyncio.gather(*tasks)
     
     # All results should be the same
     assert all(r == "fetched_value" for r in results)
-    # Should only fetch once
     assert fetch_count == 1
     # Stats should show one miss and four hits
     assert cache.stats()["misses"] == 1
-    assert cache.stats()["hits"] == 4 
\ No newline at end of file
+    assert cache.stats()["hits"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cache_get_or_set_error_not_cached(cache):
+    """Test that a failed fetch is not cached and can be retried."""
+    async def fail():
+        raise ValueError("fetch failed")
+    
+    async def fetch_value():
+        return "fetched_value"
+    
+    with pytest.raises(ValueError):
+        await cache.get_or_set("test", fail)
+    
+    assert await cache.get_or_set("test", fetch_value) == "fetched_value"
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted above max_size."""
+    cache = Cache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["size"] == 2
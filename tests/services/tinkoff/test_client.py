@@ -3,13 +3,14 @@ Tests for Tinkoff API client.
 """
 
 import asyncio
+from datetime import datetime, timedelta
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import aiohttp
 from aiohttp import ClientResponse, ClientTimeout
 
-from src.services.tinkoff.client import TinkoffClient
+from src.services.tinkoff.client import MAX_USER_CONCURRENT_CALLS, TinkoffClient, _global_sem
 from src.services.tinkoff.exceptions import (
     TinkoffAPIError,
     TinkoffAuthError,
@@ -282,4 +283,98 @@ async def test_cache_key_generation():
     key3 = client._get_cache_key("POST", "test", json={"x": 1})
     
     assert key1 == key2  # Keys should be the same regardless of param order
-    assert key1 != key3  # Different method and params should have different keys 
\ No newline at end of file
+    assert key1 != key3  # Different method and params should have different keys
+
+
+async def test_call_bounds_concurrency():
+    """Test that concurrent gRPC calls are capped by the per-user semaphore."""
+    client = TinkoffClient(AsyncMock(), "test_user")
+    client.metadata = ()
+    active = 0
+    peak = 0
+    
+    async def method(request, metadata, timeout):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0)
+        active -= 1
+        return request
+    
+    results = await asyncio.gather(*(client._call(method, i) for i in range(200)))
+    
+    assert results == list(range(200))
+    assert peak == MAX_USER_CONCURRENT_CALLS
+
+
+
+async def test_get_candles():
+    """Test that candles are requested through the market data stub."""
+    client = TinkoffClient(AsyncMock(), "test_user")
+    candle = MagicMock(volume=10, is_complete=True)
+    candle.open = candle.high = candle.low = candle.close = MagicMock(units=100, nano=0)
+    market_data = MagicMock()
+    market_data.GetCandles = AsyncMock(return_value=MagicMock(candles=[candle]))
+    client._channels = [MagicMock()]
+    client._stubs = [MagicMock(market_data=market_data)]
+    client._rr = iter([0])
+    client.metadata = ()
+    
+    end = datetime(2024, 1, 8)
+    candles = await client.get_candles("BBG000B9XRY4", end - timedelta(days=7), end, 1)
+    
+    assert len(candles) == 1
+    assert candles[0]["volume"] == 10
+    assert candles[0]["is_complete"] is True
+    market_data.GetCandles.assert_awaited_once()
+
+
+async def test_get_portfolio_cash_by_currency():
+    """Test that cash is keyed by the currency of the position FIGI, not its RUB quote."""
+    client = TinkoffClient(AsyncMock(), "test_user")
+    positions = [
+        MagicMock(figi="BBG0013HGFT4", instrument_type="currency"),
+        MagicMock(figi="RUB000UTSTOM", instrument_type="currency"),
+        MagicMock(figi="BBG000B9XRY4", instrument_type="share"),
+    ]
+    operations = MagicMock()
+    operations.GetPortfolio = AsyncMock(return_value=MagicMock(positions=positions))
+    client._channels = [MagicMock()]
+    client._stubs = [MagicMock(operations=operations)]
+    client._rr = iter([0])
+    client.metadata = ()
+    
+    with patch("src.services.tinkoff.client.quotation_to_decimal", side_effect=lambda value: 1):
+        portfolio = await client.get_portfolio("test_account")
+    
+    assert portfolio["cash_by_currency"] == {"USD": 1, "RUB": 1}
+
+
+def test_global_semaphore_per_event_loop():
+    """Test that each event loop gets its own global call semaphore."""
+    async def get_sems():
+        return _global_sem(), _global_sem()
+    
+    first, again = asyncio.run(get_sems())
+    second, _ = asyncio.run(get_sems())
+    
+    assert first is again
+    assert first is not second
+
+
+async def test_ensure_connection_builds_one_pool():
+    """Test that concurrent callers share a single channel pool."""
+    async def get_token(user_id, broker_type):
+        await asyncio.sleep(0)
+        return "token"
+    
+    token_service = AsyncMock()
+    token_service.get_token.side_effect = get_token
+    client = TinkoffClient(token_service, "test_user", pool_size=2)
+    
+    with patch.object(client, "_get_channel", side_effect=lambda: MagicMock()) as get_channel:
+        await asyncio.gather(*(client._ensure_connection() for _ in range(5)))
+    
+    assert get_channel.call_count == 2
+    assert len(client._stubs) == 2
+    token_service.get_token.assert_awaited_once()
@@ -2,6 +2,7 @@
 Tests for Tinkoff API data models.
 """
 
+import sys
 from datetime import datetime
 from decimal import Decimal
 import pytest
@@ -56,6 +57,20 @@ def test_money_amount_different_currencies():
         _ = amount1 - amount2
 
 
+def test_money_amount_to_dict():
+    """Test MoneyAmount output form."""
+    amount = MoneyAmount(currency=Currency.USD, value=Decimal("155.75"))
+    assert amount.to_dict() == {"value": "155.75", "currency": Currency.USD.value}
+
+
+def test_money_amount_immutable():
+    """Test MoneyAmount is an immutable, hashable value."""
+    amount = MoneyAmount(currency=Currency.RUB, value=Decimal("100.50"))
+    with pytest.raises(ValidationError):
+        amount.value = Decimal("1")
+    assert hash(amount) == hash(MoneyAmount(currency=Currency.RUB, value=Decimal("100.50")))
+
+
 def test_instrument_creation():
     """Test Instrument model creation."""
     instrument = Instrument(
@@ -105,6 +120,30 @@ def test_position_creation():
     assert position.current_price.value == Decimal("155.50")
 
 
+def test_position_immutable():
+    """Test Position cannot be modified after creation."""
+    position = Position(
+        figi="BBG000B9XRY4",
+        instrument_type=InstrumentType.STOCK,
+        quantity=Decimal("10"),
+        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+    )
+    with pytest.raises(ValidationError):
+        position.quantity = Decimal("5")
+
+
+def test_position_figi_interned():
+    """Test Position FIGIs share one string object."""
+    figi = "".join(["BBG000", "B9XRY4"])
+    position = Position(
+        figi=figi,
+        instrument_type=InstrumentType.STOCK,
+        quantity=Decimal("10"),
+        average_price=MoneyAmount(currency=Currency.USD, value=Decimal("150.25")),
+    )
+    assert position.figi is sys.intern(figi)
+
+
 def test_portfolio_creation():
     """Test Portfolio model creation."""
     portfolio = Portfolio(
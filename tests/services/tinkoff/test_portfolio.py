@@ -2,6 +2,7 @@
 Tests for Tinkoff API portfolio service.
 """
 
+import asyncio
 from datetime import datetime
 from decimal import Decimal
 import pytest
@@ -191,4 +192,86 @@ async def test_get_cash_by_currency(service, mock_portfolio_response, mock_curre
         
         # Non-existing currency
         amount = await service.get_cash_by_currency("123", Currency.EUR)
-        assert amount is None 
\ No newline at end of file
+        assert amount is None
+
+
+@pytest.mark.asyncio
+async def test_get_accounts_cached():
+    """Test that accounts are fetched once within the TTL."""
+    client = AsyncMock()
+    client.get_accounts.return_value = [{"id": "123"}]
+    service = PortfolioService(client)
+
+    assert await service.get_accounts() == [{"id": "123"}]
+    assert await service.get_accounts() == [{"id": "123"}]
+    client.get_accounts.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_bundle_shares_requests():
+    """Test that concurrent callers share portfolio and operations requests."""
+    client = AsyncMock()
+    client.get_portfolio.return_value = {"positions": []}
+    client.get_operations.return_value = [{"id": "op1"}]
+    service = PortfolioService(client)
+    from_date = datetime(2024, 1, 1)
+
+    bundles = await asyncio.gather(
+        service.get_bundle("123", from_date),
+        service.get_bundle("123", from_date),
+        service.get_operations("123", from_date=from_date),
+    )
+
+    assert bundles[0] == ({"positions": []}, [{"id": "op1"}])
+    assert bundles[1] == bundles[0]
+    client.get_portfolio.assert_awaited_once_with("123")
+    client.get_operations.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_shared_requests_are_not_cached_by_default():
+    """Test that finished requests are not reused unless data_ttl is set."""
+    client = AsyncMock()
+    client.get_portfolio.return_value = {"positions": []}
+    service = PortfolioService(client)
+
+    await service.get_portfolio("123")
+    await service.get_portfolio("123")
+
+    assert client.get_portfolio.await_count == 2
+    assert not service._in_flight
+
+    cached_service = PortfolioService(client, data_ttl=60)
+    await cached_service.get_portfolio("123")
+    await cached_service.get_portfolio("123")
+
+    assert client.get_portfolio.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_get_positions_by_type_builds_models():
+    """Test that indexed position dicts are returned as Position models."""
+    client = AsyncMock()
+    client.get_portfolio.return_value = {
+        "positions": [],
+        "positions_by_type": {
+            "share": [{
+                "figi": "BBG000B9XRY4",
+                "instrument_type": "share",
+                "currency": "USD",
+                "quantity": Decimal("10"),
+                "average_position_price": Decimal("150.25"),
+                "current_price": Decimal("155.50"),
+                "current_nkd": None,
+                "expected_yield": Decimal("52.50"),
+            }],
+        },
+    }
+    service = PortfolioService(client)
+
+    [position] = await service.get_positions_by_type("123", InstrumentType.STOCK)
+
+    assert isinstance(position, Position)
+    assert position.instrument_type == InstrumentType.STOCK
+    assert position.current_value == MoneyAmount(currency=Currency.USD, value=Decimal("1555.00"))
+    assert await service.get_positions_by_type("123", InstrumentType.BOND) == []
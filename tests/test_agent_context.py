@@ -1,8 +1,9 @@
+import asyncio
 import pytest
 import json
-from unittest.mock import MagicMock
-from src.models.base import Message, Tool, ToolType
-from src.agent.context import AgentContext
+import orjson
+from src.models.base import Context, Message, Tool, ToolType
+from src.agent.context import AgentContext, LEGACY_CONTEXT_KEY, LEGACY_METADATA_KEY, MESSAGES_KEY, TOOLS_KEY, METADATA_KEY
 
 
 def test_context_initialization(agent_context):
@@ -56,7 +57,7 @@ def test_update_metadata(agent_context):
     assert agent_context.context.metadata["test_key"] == "test_value"
 
 
-def test_clear_context(agent_context, sample_message, sample_tool):
+def test_clear_context(redis_mock, agent_context, sample_message, sample_tool):
     """Test clearing context."""
     # Add data to context
     agent_context.add_message(sample_message)
@@ -67,6 +68,8 @@ def test_clear_context(agent_context, sample_message, sample_tool):
     agent_context.clear_context()
     
     # Verify context is empty
+    assert redis_mock.calls["delete"] == 1
+    assert not redis_mock.store.keys() & {MESSAGES_KEY, TOOLS_KEY, METADATA_KEY}
     assert len(agent_context.get_conversation_history()) == 0
     assert agent_context.get_tool_by_name(sample_tool.name) is None
     assert agent_context.context.metadata == {}
@@ -76,26 +79,24 @@ def test_context_persistence(redis_mock, agent_context, sample_message):
     """Test that context is saved to Redis."""
     agent_context.add_message(sample_message)
     
-    # Verify Redis set was called
-    redis_mock.set.assert_called_with("mcp:context", agent_context.context.json())
+    # Verify only the new message was appended
+    assert redis_mock.calls["rpush"] == 1
+    [payload] = redis_mock.store[MESSAGES_KEY]
+    assert orjson.loads(payload) == json.loads(sample_message.json())
+    assert redis_mock.calls["hset"] == 0
 
 
 def test_load_context(redis_mock, agent_context):
     """Test loading context from Redis."""
-    # Setup mock Redis response
-    mock_context = {
-        "messages": [
-            {"content": "Test message", "role": "user"}
-        ],
-        "tools": [],
-        "metadata": {"test_key": "test_value"}
-    }
-    redis_mock.get.return_value = json.dumps(mock_context)
+    # Setup stored Redis data
+    redis_mock.store[MESSAGES_KEY] = [json.dumps({"content": "Test message", "role": "user"})]
+    redis_mock.store[METADATA_KEY] = {b"test_key": json.dumps("test_value").encode()}
     
     # Load context
     agent_context.load_context()
     
-    # Verify context was loaded
+    # Verify context was loaded in one round trip
+    assert redis_mock.calls["execute"] == 1
     assert len(agent_context.get_conversation_history()) == 1
     assert agent_context.context.metadata["test_key"] == "test_value"
 
@@ -103,4 +104,97 @@ def test_load_context(redis_mock, agent_context):
 def test_get_nonexistent_tool(agent_context):
     """Test getting tool that doesn't exist."""
     tool = agent_context.get_tool_by_name("nonexistent")
-    assert tool is None 
\ No newline at end of file
+    assert tool is None 
+
+def test_batch_saves_once(redis_mock, agent_context, sample_message, sample_tool):
+    """Test that mutations inside batch() are written once on exit."""
+    with agent_context.batch():
+        agent_context.add_message(sample_message)
+        agent_context.add_message(sample_message)
+        agent_context.add_tool(sample_tool)
+        agent_context.update_metadata("test_key", "test_value")
+        assert not redis_mock.store
+    
+    assert redis_mock.calls["execute"] == 1
+    assert redis_mock.calls["rpush"] == 2
+    assert len(redis_mock.store[MESSAGES_KEY]) == 2
+    assert [orjson.loads(data)["name"] for data in redis_mock.store[TOOLS_KEY]] == [sample_tool.name]
+    assert redis_mock.calls["hset"] == 1
+    assert redis_mock.store[METADATA_KEY] == {"test_key": orjson.dumps("test_value")}
+
+
+async def test_debounced_flush(redis_mock, sample_message):
+    """Test that a flush delay collapses mutations into one deferred write."""
+    agent_context = AgentContext(redis_mock, flush_delay=0.01)
+    agent_context.add_message(sample_message)
+    agent_context.update_metadata("test_key", "test_value")
+    assert not redis_mock.store
+    
+    await asyncio.sleep(0.02)
+    assert redis_mock.calls["execute"] == 1
+    assert redis_mock.calls["rpush"] == 1
+    assert redis_mock.calls["hset"] == 1
+    assert redis_mock.store[METADATA_KEY] == {"test_key": orjson.dumps("test_value")}
+
+
+def test_metadata_writes_only_changed_fields(redis_mock, agent_context):
+    """Test that a metadata update rewrites only its own hash field."""
+    agent_context.update_metadata("first", 1)
+    redis_mock.store[METADATA_KEY]["first"] = b"stored"
+    
+    agent_context.update_metadata("second", 2)
+    
+    assert redis_mock.store[METADATA_KEY] == {"first": b"stored", "second": b"2"}
+
+
+def test_load_context_migrates_legacy_metadata(redis_mock, agent_context):
+    """Test that metadata under the old key is moved into the hash once."""
+    redis_mock.store[LEGACY_METADATA_KEY] = orjson.dumps({"old_key": "old", "test_key": "stale"})
+    redis_mock.store[METADATA_KEY] = {b"test_key": orjson.dumps("test_value")}
+    
+    agent_context.load_context()
+    
+    assert agent_context.context.metadata == {"old_key": "old", "test_key": "test_value"}
+    assert LEGACY_METADATA_KEY not in redis_mock.store
+    assert redis_mock.store[METADATA_KEY][b"test_key"] == orjson.dumps("test_value")
+    assert redis_mock.store[METADATA_KEY]["old_key"] == orjson.dumps("old")
+
+
+async def test_load_context_flushes_pending_writes(redis_mock, sample_message):
+    """Test that buffered writes are saved before the context is reloaded."""
+    agent_context = AgentContext(redis_mock, flush_delay=60)
+    agent_context.add_message(sample_message)
+    agent_context.update_metadata("test_key", "test_value")
+    
+    agent_context.load_context()
+    
+    assert len(agent_context.get_conversation_history()) == 1
+    assert agent_context.context.metadata["test_key"] == "test_value"
+
+
+def test_load_context_migrates_baseline_context(redis_mock, agent_context, sample_message, sample_tool):
+    """Test that a whole-context JSON value under the old key is moved to lists and hash."""
+    legacy = Context(
+        messages=[Message(content="Old message", role="user")],
+        tools=[sample_tool],
+        metadata={"old_key": "old"},
+    )
+    redis_mock.store[LEGACY_CONTEXT_KEY] = legacy.model_dump_json().encode()
+    agent_context.add_message(sample_message)
+    
+    agent_context.load_context()
+    
+    assert [msg.content for msg in agent_context.get_conversation_history()] == [
+        "Old message", sample_message.content
+    ]
+    assert agent_context.get_tool_by_name(sample_tool.name) is not None
+    assert agent_context.context.metadata == {"old_key": "old"}
+    assert LEGACY_CONTEXT_KEY not in redis_mock.store
+    assert [orjson.loads(data)["content"] for data in redis_mock.store[MESSAGES_KEY]] == [
+        "Old message", sample_message.content
+    ]
+    assert len(redis_mock.store[TOOLS_KEY]) == 1
+    assert redis_mock.store[METADATA_KEY] == {"old_key": orjson.dumps("old")}
+    
+    agent_context.clear_context()
+    assert not redis_mock.store
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from tinkoff.invest import Client, OperationState, OperationType, InstrumentIdType, InstrumentStatus, SharesResponse, BondsResponse, EtfsResponse, CandleInterval, HistoricCandle, GetOrderBookResponse, Quotation, OrderBookInstrument
 from datetime import datetime, time, timedelta, date
@@ -11,6 +12,8 @@ from dataclasses import dataclass
 from enum import Enum
 import time as time_lib
 from functools import wraps
+from decimal import Decimal
+import orjson
 
 class RecommendationType(Enum):
     BUY = "BUY"
@@ -45,6 +48,21 @@ class PortfolioRecommendation:
     risk_metrics: Dict[str, float]
     historical_performance: Dict[str, float]
 
+def _orjson_default(obj):
+    """Сериализация типов, которые orjson не поддерживает нативно"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+class DecimalORJSONResponse(ORJSONResponse):
+    """ORJSONResponse с поддержкой Decimal"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
 def retry_on_connection_error(max_retries=3, delay=1):
     """Декоратор для повторных попыток при ошибках подключения"""
     def decorator(func):
@@ -236,7 +254,10 @@ class TinkoffAgent:
         self.config = config
         self.logger = logging.getLogger('tinkoff_agent')
         self.market_analyzer = MarketDataAnalyzer(client)
-        self.app = FastAPI(title="Tinkoff Trading Agent")
+        self.app = FastAPI(
+            title="Tinkoff Trading Agent",
+            default_response_class=DecimalORJSONResponse
+        )
         self.setup_routes()
 
     def get_all_accounts(self) -> List[dict]: